@@ -1,7 +1,40 @@
 class Accao:
-    def __init__(self, dx: int, dy: int):
-        self.dx = dx
-        self.dy = dy
+    """
+    Ação (dx, dy) imutável. Há um só objeto por par: Accao(dx, dy) devolve sempre a mesma
+    instância, por isso criar ações no ciclo de simulação não aloca memória.
+    """
+    __slots__ = ("dx", "dy", "_rodada")
+    _instancias = {}
+
+    def __new__(cls, dx: int, dy: int):
+        accao = cls._instancias.get((dx, dy))
+        if accao is None:
+            accao = object.__new__(cls)
+            object.__setattr__(accao, "dx", int(dx))
+            object.__setattr__(accao, "dy", int(dy))
+            object.__setattr__(accao, "_rodada", None)
+            cls._instancias[(accao.dx, accao.dy)] = accao
+        return accao
+
+    def rodada(self) -> "Accao":
+        """A ação rodada 90º (a usada depois de uma colisão)."""
+        rodada = self._rodada
+        if rodada is None:
+            rodada = Accao(-self.dy, self.dx)
+            object.__setattr__(self, "_rodada", rodada)
+        return rodada
+
+    def __setattr__(self, nome, valor):
+        raise AttributeError("Accao é imutável")
+
+    def __delattr__(self, nome):
+        raise AttributeError("Accao é imutável")
+
+    def __reduce__(self):
+        return (Accao, (self.dx, self.dy))
 
     def __repr__(self):
         return f"Accao(dx={self.dx}, dy={self.dy})"
+
+# Ação nula (agente parado)
+PARADO = Accao(0, 0)
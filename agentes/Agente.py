@@ -1,4 +1,4 @@
-from agentes.Accao import Accao
+from agentes.Accao import Accao, PARADO
 from agentes.Politicas import Politica, PoliticaAleatoria
 from agentes.Sensor import Sensor
 from agentes.Observacao import Observacao
@@ -10,17 +10,47 @@ class AgenteBase:
         self.politica = politica 
         self.sensores = []
         self.estado = 0
-        self.colisoes = 0 
-        self.agente_no_farol = False
+        # colisoes e agente_no_farol vivem nas listas do EstadoAgentes do motor, depois de registado;
+        # até lá ficam no próprio agente (sem referências circulares, libertado logo que deixa de ser usado)
+        self._estado = None
+        self.indice = None
+        self._colisoes = 0
+        self._no_farol = False
         self.caminho=None
 
+    @property
+    def colisoes(self):
+        if self._estado is None:
+            return self._colisoes
+        return self._estado.colisoes[self.indice]
+
+    @colisoes.setter
+    def colisoes(self, valor):
+        if self._estado is None:
+            self._colisoes = valor
+        else:
+            self._estado.colisoes[self.indice] = valor
+
+    @property
+    def agente_no_farol(self):
+        if self._estado is None:
+            return self._no_farol
+        return self._estado.no_farol[self.indice]
+
+    @agente_no_farol.setter
+    def agente_no_farol(self, valor):
+        if self._estado is None:
+            self._no_farol = valor
+        else:
+            self._estado.no_farol[self.indice] = valor
+
     def reset_fitness(self): 
         # para o NEAT
         self.colisoes = 0
 
     def registar_colisao(self,accao: Accao):
         self.colisoes += 1 
-        return Accao(accao.dy * -1, accao.dx)
+        return accao.rodada()
 
             
     def receberObservacao(self, obs):
@@ -31,7 +61,7 @@ class AgenteBase:
 
     def age(self):
         if self.agente_no_farol:
-            return Accao(0,0)  # Fica parado se já chegou ao farol       
+            return PARADO  # Fica parado se já chegou ao farol       
         return self.escolherAccao()
 
     def avaliacaoEstadoAtual(self, recompensa):
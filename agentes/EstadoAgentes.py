@@ -0,0 +1,27 @@
+class EstadoAgentes:
+    """
+    Estado por agente em listas paralelas, indexadas pelo índice denso de cada agente
+    (AgenteBase.indice). Os atributos 'colisoes' e 'agente_no_farol' do AgenteBase
+    são vistas sobre estas listas. Cada MotorDeSimulacao tem o seu; um agente ainda
+    não registado guarda os valores em atributos próprios.
+    """
+    def __init__(self):
+        self.agentes = []
+        self.colisoes = []
+        self.no_farol = []
+
+    def registar(self, agente) -> int:
+        """Dá ao agente o próximo índice, trazendo os valores que tinha (se já estava noutro)."""
+        anterior = agente._estado
+        if anterior is self:
+            return agente.indice
+        colisoes, no_farol = agente.colisoes, agente.agente_no_farol
+        indice = len(self.agentes)
+        self.agentes.append(agente)
+        self.colisoes.append(colisoes)
+        self.no_farol.append(no_farol)
+        agente._estado, agente.indice = self, indice
+        return indice
+
+    def __len__(self):
+        return len(self.agentes)
@@ -1,10 +1,59 @@
 # Em agentes/Observacao.py
+class ResultadoSensor:
+    """Resultado imutável de um sensor; também aceita o acesso antigo por chave (resultado['accao_base'])."""
+    __slots__ = ("accao_base", "recompensa_sondada")
+
+    def __init__(self, accao_base, recompensa_sondada):
+        object.__setattr__(self, "accao_base", accao_base)
+        object.__setattr__(self, "recompensa_sondada", recompensa_sondada)
+
+    def __getitem__(self, chave):
+        return getattr(self, chave)
+
+    def __setattr__(self, nome, valor):
+        raise AttributeError("ResultadoSensor é imutável")
+
+    def __reduce__(self):
+        return (ResultadoSensor, (self.accao_base, self.recompensa_sondada))
+
+    def __repr__(self):
+        return f"ResultadoSensor({self.accao_base}, {self.recompensa_sondada})"
+
+
 class Observacao:
-    def __init__(self, posicao_atual: tuple, resultados_sensores: list = None):
-        self.posicao_atual = posicao_atual
-        self.resultados_sensores = resultados_sensores if resultados_sensores else []
+    """
+    Observação imutável: o ambiente guarda e reutiliza a mesma observação para todos os
+    agentes com os mesmos sensores na mesma posição (ver AmbienteBase.observacaoPara).
+    Os resultados dos sensores podem ser dados já calculados ou por uma função 'calcular',
+    chamada só no primeiro acesso (as políticas que não os leem não pagam as sondagens).
+    """
+    __slots__ = ("posicao_atual", "_resultados", "_calcular")
+
+    def __init__(self, posicao_atual: tuple, resultados_sensores=None, calcular=None):
+        object.__setattr__(self, "posicao_atual", posicao_atual)
+        if calcular is None:
+            object.__setattr__(self, "_resultados", tuple(resultados_sensores) if resultados_sensores else ())
+        else:
+            object.__setattr__(self, "_resultados", None)
+        object.__setattr__(self, "_calcular", calcular)
 
+    @property
+    def resultados_sensores(self) -> tuple:
+        resultados = self._resultados
+        if resultados is None:
+            resultados = tuple(self._calcular())
+            object.__setattr__(self, "_resultados", resultados)
+            object.__setattr__(self, "_calcular", None)
+        return resultados
 
+    def __setattr__(self, nome, valor):
+        raise AttributeError("Observacao é imutável")
+
+    def __reduce__(self):
+        return (Observacao, (self.posicao_atual, self.resultados_sensores))
         
     def __repr__(self):
-        return f"Observacao(pos={self.posicao_atual}), sensores={len(self.resultados_sensores)})"
\ No newline at end of file
+        return f"Observacao(pos={self.posicao_atual}), sensores={len(self.resultados_sensores)})"
+
+# Observação dada às políticas que não leem nenhum campo (Politica.campos_observacao vazio)
+SEM_OBSERVACAO = Observacao(posicao_atual=None)
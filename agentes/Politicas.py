@@ -1,16 +1,32 @@
 # Em agentes/politicas/Politica.py (classe base)
 from abc import ABC, abstractmethod
-from agentes.Accao import Accao
+from operator import attrgetter
+from agentes.Accao import Accao, PARADO
 from agentes.Observacao import Observacao
+from agentes.TabelaQ import TabelaQ, ACOES, INDICE_ACAO
 import random
 import numpy as np
 class Politica(ABC):
+    # Campos da Observacao que a política lê; o ambiente só calcula os resultados dos sensores
+    # se forem lidos, e a uma política sem campos dá sempre SEM_OBSERVACAO
+    campos_observacao = ("posicao_atual", "resultados_sensores")
+
     @abstractmethod
     def decidirAccao(self, observacao: Observacao) -> Accao:
         pass
 
+    def determinista(self, observacao: Observacao) -> bool:
+        """
+        Indica se a decisão para esta observação é sempre a mesma (não depende de sorteios).
+        Usado pelo MotorDeSimulacao para detetar ciclos; por omissão assume que não.
+        """
+        return False
+
+_RECOMPENSA_SONDADA = attrgetter("recompensa_sondada")
+
 class PoliticaFixa(Politica):
-    
+    campos_observacao = ("resultados_sensores",)
+
     def __init__(self):
         # Política de fallback caso não hajam sensores
         self.fallback = PoliticaAleatoria()
@@ -24,34 +40,52 @@ class PoliticaFixa(Politica):
         # (Lembrando que -5 é maior/melhor que -10)
         melhor_resultado = max(
             observacao.resultados_sensores, 
-            key=lambda resul: resul['recompensa_sondada']
+            key=_RECOMPENSA_SONDADA
         )
 
         # Devolve a ação base associada a esse melhor sensor
-        return melhor_resultado['accao_base']
+        return melhor_resultado.accao_base
+
+    def determinista(self, observacao: Observacao) -> bool:
+        # Só o fallback (sem sensores) é aleatório
+        return bool(observacao.resultados_sensores)
 
 class PoliticaAleatoria(Politica):
+    campos_observacao = ()
+
     def __init__(self):
-        self.movimentos_possiveis = [
+        self.movimentos_possiveis = (
             Accao(1, 0),
             Accao(-1, 0),
             Accao(0, 1),
             Accao(0, -1)
-        ]
+        )
 
     def decidirAccao(self, observacao: Observacao) -> Accao:
         # Por agora, a política aleatória ignora a observação
         return random.choice(self.movimentos_possiveis)
     
+# Ação de cada output da rede neural (índice do argmax): Norte, Sul, Oeste, Este
+ACOES_REDE = ((0, -1), (0, 1), (-1, 0), (1, 0))
+_ACCOES_REDE = tuple(Accao(dx, dy) for dx, dy in ACOES_REDE)
+
+def accao_da_rede(escolha) -> Accao:
+    if 0 <= escolha < len(_ACCOES_REDE):
+        return _ACCOES_REDE[escolha]
+    return PARADO
+
 class PoliticaRedeNeuronal(Politica):
+    # Os inputs vêm do ambiente (inputs_neurais_tabelados), não da observação
+    campos_observacao = ()
+
     def __init__(self, rede_neural, ambiente_ref, agente_ref):
         self.net = rede_neural
         self.ambiente = ambiente_ref
         self.agente = agente_ref
         
     def decidirAccao(self, observacao: Observacao) -> Accao:
-        # Obter inputs normalizados do ambiente
-        inputs = self.ambiente.get_inputs_neurais(self.agente)
+        # Obter inputs normalizados do ambiente (tabela pré-calculada por célula)
+        inputs = self.ambiente.inputs_neurais_tabelados(self.agente)
         # print(f"Inputs para a rede neural: {inputs}")
         # Ativar a rede
         outputs = self.net.activate(inputs)
@@ -60,40 +94,53 @@ class PoliticaRedeNeuronal(Politica):
         # Escolhe o índice com maior valor (argmax)
         escolha = np.argmax(outputs)
         #print(f"Escolha da ação (índice): {escolha}")
-        if escolha == 0: return Accao(0, -1) # Norte
-        if escolha == 1: return Accao(0, 1)  # Sul
-        if escolha == 2: return Accao(-1, 0) # Oeste
-        if escolha == 3: return Accao(1, 0)  # Este
-        
-        return Accao(0,0)
+        return accao_da_rede(escolha)
+
+    def determinista(self, observacao: Observacao) -> bool:
+        return True
     
 
 class PoliticaQLearning(Politica):
+    campos_observacao = ("posicao_atual",)
+
     def __init__(self, alpha=0.1, gamma=0.9, epsilon=0.1, q_table=None):
         """
         Args:
             alpha: Probabilidade de aprendizagem.
             gamma: Fator de desconto.
             epsilon: Probabilidade de exploração.
-            q_table: Dicionário com a memória (se carregado de ficheiro).
+            q_table: Dicionário com a memória (se carregado de ficheiro) ou uma TabelaQ.
         """
         self.alpha = alpha
         self.gamma = gamma
         self.epsilon = epsilon
-        self.acoes_possiveis = [Accao(0, -1), Accao(0, 1),Accao(-1, 0),Accao(1, 0)]
-        # Tabela Q: Chave = (x, y), Valor = Dict {(dx, dy): valor}
-        self.Q = q_table if q_table is not None else {}
+        self.acoes_possiveis = tuple(Accao(dx, dy) for dx, dy in ACOES)
+        # Tabela Q densa: valores[y, x, indice da ação], com a ordem de acoes_possiveis
+        if isinstance(q_table, TabelaQ):
+            self.tabela = q_table
+        else:
+            self.tabela = TabelaQ.de_dicionario(q_table if q_table is not None else {})
         self.treinando = True # Flag para ativar/desativar aprendizagem
 
+    @property
+    def Q(self):
+        """Tabela Q no formato antigo: Chave = (x, y), Valor = Dict {(dx, dy): valor}"""
+        return self.tabela.para_dicionario()
+
+    @Q.setter
+    def Q(self, q_table):
+        self.tabela = TabelaQ.de_dicionario(q_table)
+
     def decidirAccao(self, observacao) -> Accao:
         if observacao.posicao_atual is None:
-            return Accao(0, 0)
+            return PARADO
         
-        estado = (int(observacao.posicao_atual[0]), int(observacao.posicao_atual[1]))
+        x, y = int(observacao.posicao_atual[0]), int(observacao.posicao_atual[1])
         
-        # 2. Inicializar estado na Q-Table se não existir
-        if estado not in self.Q:
-            self.Q[estado] = { (a.dx, a.dy): 0.0 for a in self.acoes_possiveis }
+        # 2. Inicializar estado na Q-Table se não existir (só a treinar: sem treino a tabela
+        # pode ser a partilhada do RegistoModelos e não é alterada)
+        if self.treinando:
+            self.tabela.inicializar(x, y)
 
         # 3. Epsilon-Greedy
         # Se estivermos a treinar, usa epsilon. Se for teste, epsilon = 0 (apenas explora se for muito pequeno)
@@ -105,13 +152,27 @@ class PoliticaQLearning(Politica):
         else:
             # Exploitation: Melhor ação
             # Encontrar o valor máximo neste estado
-            valores = self.Q[estado]
-            max_valor = max(valores.values())
+            altura, largura = self.tabela.visitados.shape
+            if 0 <= x < largura and 0 <= y < altura:
+                valores = self.tabela.valores[y, x].tolist()
+            else:
+                valores = [0.0] * len(self.acoes_possiveis)  # estado desconhecido: valores iniciais
+            max_valor = max(valores)
             
             # Pegar todas as ações que têm esse valor máximo (para desempatar aleatoriamente)
-            melhores_acoes_tuples = [k for k, v in valores.items() if v == max_valor]
-            dx, dy = random.choice(melhores_acoes_tuples) 
-            return Accao(dx, dy)
+            melhores = [i for i, v in enumerate(valores) if v == max_valor]
+            return self.acoes_possiveis[random.choice(melhores)]
+
+    def determinista(self, observacao) -> bool:
+        # Sem treino a escolha é gulosa; só é aleatória se houver empate no máximo
+        if self.treinando or observacao.posicao_atual is None:
+            return False
+        x, y = int(observacao.posicao_atual[0]), int(observacao.posicao_atual[1])
+        altura, largura = self.tabela.visitados.shape
+        if not (0 <= x < largura and 0 <= y < altura):
+            return False
+        valores = self.tabela.valores[y, x].tolist()
+        return valores.count(max(valores)) == 1
 
     def aprender(self, estado_antigo, accao_tomada, recompensa, estado_novo):
         """
@@ -120,21 +181,19 @@ class PoliticaQLearning(Politica):
         if not self.treinando:
             return
 
-        # Converter para tuplos (chaves do dicionário)
-        s = (int(estado_antigo[0]), int(estado_antigo[1]))
-        s_prox = (int(estado_novo[0]), int(estado_novo[1]))
-        a_key = (accao_tomada.dx, accao_tomada.dy)
+        sx, sy = int(estado_antigo[0]), int(estado_antigo[1])
+        px, py = int(estado_novo[0]), int(estado_novo[1])
+        a = INDICE_ACAO[(accao_tomada.dx, accao_tomada.dy)]
 
         # Garantir que entradas existem
-        if s not in self.Q:
-            self.Q[s] = { (a.dx, a.dy): 0.0 for a in self.acoes_possiveis }
-        if s_prox not in self.Q:
-            self.Q[s_prox] = { (a.dx, a.dy): 0.0 for a in self.acoes_possiveis }
+        self.tabela.inicializar(sx, sy)
+        self.tabela.inicializar(px, py)
+        valores = self.tabela.valores
 
         # Equação de Bellman
-        q_atual = self.Q[s][a_key]
-        max_q_prox = max(self.Q[s_prox].values())
+        q_atual = valores.item(sy, sx, a)
+        max_q_prox = max(valores[py, px].tolist())
         
         # Atualização
         novo_q = q_atual + self.alpha * (recompensa + self.gamma * max_q_prox - q_atual)
-        self.Q[s][a_key] = novo_q
\ No newline at end of file
+        valores[sy, sx, a] = novo_q
@@ -0,0 +1,132 @@
+import numpy as np
+from neat.graphs import feed_forward_layers
+
+# Funções de ativação suportadas (as de activation_options em config-feedforward.txt)
+ATIVACOES = {"sigmoid": 0, "tanh": 1, "relu": 2}
+
+def _aplicar_ativacoes(z, ids):
+    """Mesmas fórmulas de neat.activations, aplicadas a arrays."""
+    saida = np.empty_like(z)
+    m = ids == ATIVACOES["sigmoid"]
+    if m.any():
+        saida[m] = 1.0 / (1.0 + np.exp(-np.clip(5.0 * z[m], -60.0, 60.0)))
+    m = ids == ATIVACOES["tanh"]
+    if m.any():
+        saida[m] = np.tanh(np.clip(2.5 * z[m], -60.0, 60.0))
+    m = ids == ATIVACOES["relu"]
+    if m.any():
+        saida[m] = np.where(z[m] > 0.0, z[m], 0.0)
+    return saida
+
+
+class RedeCompilada:
+    """
+    Rede feed-forward de um genoma NEAT compilada em matrizes por camada.
+    Os valores dos nós vivem num vetor [inputs | outputs | nós escondidos]; cada camada
+    tem a matriz de pesos (nós da camada x valores), bias, resposta e ids de ativação.
+    Dá os mesmos outputs que neat.nn.FeedForwardNetwork (a menos de arredondamentos).
+    """
+    def __init__(self, num_inputs, num_outputs, num_valores, camadas):
+        self.num_inputs = num_inputs
+        self.num_outputs = num_outputs
+        self.num_valores = num_valores
+        # Lista de (indices, pesos, bias, resposta, ativacoes)
+        self.camadas = camadas
+
+    @classmethod
+    def compilar(cls, genome, config):
+        gc = config.genome_config
+        ligacoes = [cg.key for cg in genome.connections.values() if cg.enabled]
+        camadas_nos = feed_forward_layers(gc.input_keys, gc.output_keys, ligacoes)
+
+        indice = {k: i for i, k in enumerate(list(gc.input_keys) + list(gc.output_keys))}
+        for camada in camadas_nos:
+            for no in camada:
+                if no not in indice:
+                    indice[no] = len(indice)
+        num_valores = len(indice)
+
+        camadas = []
+        for camada in camadas_nos:
+            nos = sorted(camada)
+            pesos = np.zeros((len(nos), num_valores))
+            bias = np.zeros(len(nos))
+            resposta = np.zeros(len(nos))
+            ativacoes = np.zeros(len(nos), dtype=np.int64)
+            for j, no in enumerate(nos):
+                ng = genome.nodes[no]
+                if ng.aggregation != "sum":
+                    raise ValueError(f"Agregação '{ng.aggregation}' não suportada pela rede compilada")
+                if ng.activation not in ATIVACOES:
+                    raise ValueError(f"Ativação '{ng.activation}' não suportada pela rede compilada")
+                bias[j] = ng.bias
+                resposta[j] = ng.response
+                ativacoes[j] = ATIVACOES[ng.activation]
+            linha = {no: j for j, no in enumerate(nos)}
+            for entrada, saida in ligacoes:
+                if saida in linha:
+                    pesos[linha[saida], indice[entrada]] += genome.connections[(entrada, saida)].weight
+            indices = np.array([indice[no] for no in nos], dtype=np.int64)
+            camadas.append((indices, pesos, bias, resposta, ativacoes))
+
+        return cls(len(gc.input_keys), len(gc.output_keys), num_valores, camadas)
+
+    def ativar_lote(self, inputs):
+        """Ativa a rede para um lote de inputs (B, num_inputs); devolve (B, num_outputs)."""
+        inputs = np.asarray(inputs, dtype=float)
+        valores = np.zeros((len(inputs), self.num_valores))
+        valores[:, :self.num_inputs] = inputs
+        for indices, pesos, bias, resposta, ativacoes in self.camadas:
+            z = bias + resposta * (valores @ pesos.T)
+            valores[:, indices] = _aplicar_ativacoes(z, np.broadcast_to(ativacoes, z.shape))
+        return valores[:, self.num_inputs:self.num_inputs + self.num_outputs]
+
+    def activate(self, inputs):
+        # Mesma interface de neat.nn.FeedForwardNetwork
+        if len(inputs) != self.num_inputs:
+            raise RuntimeError(f"Expected {self.num_inputs} inputs, got {len(inputs)}")
+        return self.ativar_lote([inputs])[0].tolist()
+
+
+class PopulacaoCompilada:
+    """
+    Várias redes compiladas (uma por agente) avaliadas num só passo.
+    As camadas de todas as redes são alinhadas e preenchidas com zeros, e a escrita
+    dos nós de enchimento vai para uma coluna extra que nunca é lida.
+    """
+    def __init__(self, redes):
+        self.num_redes = len(redes)
+        self.num_inputs = redes[0].num_inputs
+        self.num_outputs = redes[0].num_outputs
+        self.num_valores = max(r.num_valores for r in redes) + 1
+        lixo = self.num_valores - 1
+        num_camadas = max((len(r.camadas) for r in redes), default=0)
+
+        self.camadas = []
+        for l in range(num_camadas):
+            largura = max((len(r.camadas[l][0]) for r in redes if l < len(r.camadas)), default=0)
+            indices = np.full((self.num_redes, largura), lixo, dtype=np.int64)
+            pesos = np.zeros((self.num_redes, largura, self.num_valores))
+            bias = np.zeros((self.num_redes, largura))
+            resposta = np.zeros((self.num_redes, largura))
+            ativacoes = np.zeros((self.num_redes, largura), dtype=np.int64)
+            for p, rede in enumerate(redes):
+                if l >= len(rede.camadas):
+                    continue
+                idx, w, b, resp, act = rede.camadas[l]
+                n = len(idx)
+                indices[p, :n] = idx
+                pesos[p, :n, :rede.num_valores] = w
+                bias[p, :n] = b
+                resposta[p, :n] = resp
+                ativacoes[p, :n] = act
+            self.camadas.append((indices, pesos, bias, resposta, ativacoes))
+
+    def ativar(self, inputs):
+        """inputs (P, num_inputs), uma linha por rede; devolve (P, num_outputs)."""
+        valores = np.zeros((self.num_redes, self.num_valores))
+        valores[:, :self.num_inputs] = inputs
+        for indices, pesos, bias, resposta, ativacoes in self.camadas:
+            z = bias + resposta * np.einsum("pnv,pv->pn", pesos, valores)
+            np.put_along_axis(valores, indices, _aplicar_ativacoes(z, ativacoes), axis=1)
+        return valores[:, self.num_inputs:self.num_inputs + self.num_outputs]
@@ -0,0 +1,53 @@
+import os
+import pickle
+from agentes.Politicas import PoliticaQLearning, PoliticaRedeNeuronal
+from agentes.TabelaQ import TabelaQ
+
+# Registo de modelos do processo: cada ficheiro (config NEAT, genoma, tabela Q) é lido uma vez.
+# Chave: (tipo, caminho absoluto, mtime), por isso um ficheiro alterado volta a ser lido.
+CONFIG_PADRAO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config-feedforward.txt")
+_cache = {}
+
+def _obter(tipo, caminho, carregar):
+    caminho = os.path.abspath(caminho)
+    chave = (tipo, caminho, os.stat(caminho).st_mtime_ns)
+    valor = _cache.get(chave)
+    if valor is None:
+        valor = _cache[chave] = carregar(caminho)
+    return valor
+
+def _ler_pickle(caminho):
+    with open(caminho, "rb") as f:
+        return pickle.load(f)
+
+def carregar_config(caminho=CONFIG_PADRAO):
+    import neat  # só as políticas NEAT precisam do neat (as tabelas Q não)
+    return _obter("config", caminho, lambda c: neat.Config(neat.DefaultGenome, neat.DefaultReproduction,
+                                                           neat.DefaultSpeciesSet, neat.DefaultStagnation, c))
+
+def carregar_genoma(caminho):
+    return _obter("genoma", caminho, _ler_pickle)
+
+def carregar_rede(caminho, caminho_config=CONFIG_PADRAO):
+    """Rede feed-forward do genoma; pode ser partilhada, os pesos só são lidos."""
+    import neat
+    config = carregar_config(caminho_config)
+    return _obter(("rede", os.path.abspath(caminho_config)), caminho,
+                  lambda c: neat.nn.FeedForwardNetwork.create(carregar_genoma(c), config))
+
+def carregar_tabela_q(caminho) -> TabelaQ:
+    """Tabela Q partilhada (só para políticas que não treinam)."""
+    return _obter("tabela_q", caminho, lambda c: TabelaQ.de_dicionario(_ler_pickle(c).get("Q")))
+
+def politica_rede(caminho, ambiente, agente, caminho_config=CONFIG_PADRAO) -> PoliticaRedeNeuronal:
+    """Política NEAT de um agente, com a rede partilhada por todos os agentes do mesmo ficheiro."""
+    return PoliticaRedeNeuronal(carregar_rede(caminho, caminho_config), ambiente, agente)
+
+def politica_qlearning(caminho) -> PoliticaQLearning:
+    """Política Q-Learning em modo de teste (sem exploração nem aprendizagem) com a tabela partilhada."""
+    politica = PoliticaQLearning(epsilon=0.0, q_table=carregar_tabela_q(caminho))
+    politica.treinando = False
+    return politica
+
+def limpar():
+    _cache.clear()
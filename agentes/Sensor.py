@@ -1,13 +1,22 @@
-
 from agentes.Accao import Accao
 
 class Sensor:
+    __slots__ = ("direcao_accao", "movimentos", "desvios")
+
     def __init__(self, direcao: list, movimentos: int):
         # A 'direcao' é a ação base que este sensor representa
-        self.direcao_accao = Accao(direcao[0], direcao[1])
+        object.__setattr__(self, "direcao_accao", Accao(direcao[0], direcao[1]))
         # 'movimentos' é a "distância" que o sensor sonda
-        self.movimentos = movimentos
+        object.__setattr__(self, "movimentos", movimentos)
+        # Deslocamentos (dx, dy) das posições sondadas, calculados uma vez
+        dx, dy = self.direcao_accao.dx, self.direcao_accao.dy
+        object.__setattr__(self, "desvios", tuple((dx * passo, dy * passo) for passo in range(1, movimentos + 1)))
+
+    def __setattr__(self, nome, valor):
+        raise AttributeError("Sensor é imutável")
 
+    def __reduce__(self):
+        return (Sensor, ((self.direcao_accao.dx, self.direcao_accao.dy), self.movimentos))
     
     def __repr__(self):
-        return f"Sensor(direcao={self.direcao_accao}, movimentos={self.movimentos})"
\ No newline at end of file
+        return f"Sensor(direcao={self.direcao_accao}, movimentos={self.movimentos})"
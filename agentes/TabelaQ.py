@@ -0,0 +1,70 @@
+import numpy as np
+
+# Ordem das ações na última dimensão da tabela (igual a PoliticaQLearning.acoes_possiveis)
+ACOES = ((0, -1), (0, 1), (-1, 0), (1, 0))  # Norte, Sul, Oeste, Este
+INDICE_ACAO = {accao: i for i, accao in enumerate(ACOES)}
+
+class TabelaQ:
+    """
+    Tabela Q densa: array (altura, largura, 4) de valores + máscara dos estados já
+    inicializados (os que existiriam no dicionário antigo). A tabela cresce
+    automaticamente quando aparece um estado fora das dimensões atuais.
+    """
+    def __init__(self, largura=0, altura=0):
+        self.valores = np.zeros((altura, largura, len(ACOES)))
+        self.visitados = np.zeros((altura, largura), dtype=bool)
+
+    @classmethod
+    def de_dicionario(cls, q_table: dict):
+        """Importa o formato antigo {(x, y): {(dx, dy): valor}} (ficheiros vencedores/*QL.pkl)."""
+        tabela = cls()
+        for (x, y), valores in q_table.items():
+            x, y = int(x), int(y)
+            tabela.inicializar(x, y)
+            for accao, valor in valores.items():
+                tabela.valores[y, x, INDICE_ACAO[accao]] = valor
+        return tabela
+
+    def para_dicionario(self) -> dict:
+        """Exporta para o formato antigo, só com os estados inicializados."""
+        q_table = {}
+        for y, x in zip(*np.nonzero(self.visitados)):
+            linha = self.valores[y, x].tolist()
+            q_table[(int(x), int(y))] = {accao: linha[i] for i, accao in enumerate(ACOES)}
+        return q_table
+
+    def __len__(self):
+        return int(self.visitados.sum())
+
+    def garantir(self, x, y):
+        """Aumenta a tabela (pelo menos para o dobro) se (x, y) ainda não couber."""
+        if x < 0 or y < 0:
+            raise ValueError(f"Estado com coordenadas negativas: {(x, y)}")
+        altura, largura = self.visitados.shape
+        if y < altura and x < largura:
+            return
+        nova_altura = max(altura, y + 1, 2 * altura if y >= altura else 0)
+        nova_largura = max(largura, x + 1, 2 * largura if x >= largura else 0)
+        valores = np.zeros((nova_altura, nova_largura, len(ACOES)))
+        valores[:altura, :largura] = self.valores
+        visitados = np.zeros((nova_altura, nova_largura), dtype=bool)
+        visitados[:altura, :largura] = self.visitados
+        self.valores, self.visitados = valores, visitados
+
+    def inicializar(self, x, y):
+        # Equivalente a criar a entrada { (dx, dy): 0.0 } no dicionário antigo
+        altura, largura = self.visitados.shape
+        if not (0 <= x < largura and 0 <= y < altura):
+            self.garantir(x, y)
+        self.visitados[y, x] = True
+
+    def acoes_gulosas(self, xs, ys, aleatorios):
+        """
+        Índices das melhores ações para vários estados de uma vez.
+        Os empates são desfeitos com 'aleatorios' (uniformes em [0, 1), um por estado).
+        """
+        linhas = self.valores[ys, xs]
+        melhores = linhas == linhas.max(axis=1, keepdims=True)
+        escolhido = (aleatorios * melhores.sum(axis=1)).astype(np.int64)
+        # Posição do (escolhido+1)-ésimo empate de cada linha
+        return np.argmax(np.cumsum(melhores, axis=1) > escolhido[:, None], axis=1)
@@ -1,8 +1,16 @@
 
+import copy
 import math
+import numpy as np
 from agentes.Agente import AgenteBase
 from agentes.Accao import Accao
-from agentes.Observacao import Observacao
+from agentes.Observacao import Observacao, ResultadoSensor, SEM_OBSERVACAO
+from ambiente.Obstaculos import Obstaculo
+from ambiente.OcupacaoAgentes import OcupacaoAgentes
+from ambiente.Trajetorias import GravadorTrajetorias
+
+# Nº máximo de observações guardadas por configuração de sensores (em grelhas enormes a cache é esvaziada)
+LIMITE_OBSERVACOES = 1 << 18
 
 class AmbienteBase():
     def __init__(self, largura=10, altura=10, dificuldade=1):
@@ -12,16 +20,131 @@ class AmbienteBase():
         self.farol = None
         self.posicoes_agentes = {}
         self.historico_paths = {}
+        # Cria as trajetórias de historico_paths (arrays compactos ou só contadores)
+        self.gravador = GravadorTrajetorias()
         self.obstaculos = []
+        # Índice de ocupação dos obstáculos (consultas O(1) em vez de percorrer a lista)
+        self.posicoes_obstaculos = set()
+        self.grelha_obstaculos = np.zeros((altura, largura), dtype=bool)
+        # Lista (x, y) dos obstáculos para o Visualizador e nº de alterações (para redesenhar a camada estática)
+        self._lista_obstaculos = None
+        self.versao_obstaculos = 0
+        # Tabelas (altura, largura, 12) de inputs neurais por configuração de sensores
+        self._tabelas_inputs = {}
+        self._chaves_sensores = {}
+        # Observações já construídas: (farol, sensores) -> {posição: Observacao}
+        self._observacoes = {}
         self.ultimas_acoes = {}
+        # Agentes que entraram na célula do farol desde a última verificação do motor
+        self.chegadas = []
         self.passo_atual = 0
+        # Estatísticas da instrumentação (definidas pelo MotorDeSimulacao; None = desligada)
+        self.estatisticas = None
+        # Ocupação das células pelos agentes (opcional, ver ativar_ocupacao) e modo em que se bloqueiam
+        self.ocupacao = None
+        self.bloquear_agentes = False
+        # True quando os obstáculos são partilhados com clones (copiados antes de serem alterados)
+        self._estrutura_partilhada = False
     
     def adicionar_agente(self, agente: AgenteBase, pos_inicial: tuple = (1, 1)):
+        if self.ocupacao is not None:
+            if agente in self.posicoes_agentes:
+                self.ocupacao.remover(agente, self.posicoes_agentes[agente])
+            self.ocupacao.adicionar(agente, pos_inicial)
         self.posicoes_agentes[agente] = pos_inicial
-        self.historico_paths[agente] = [pos_inicial]
+        self.historico_paths[agente] = self.gravador.nova(pos_inicial, self.passo_atual)
+
+    def ativar_ocupacao(self, bloquear=False):
+        """
+        Liga o índice de ocupação dos agentes (self.ocupacao). Com bloquear=True um agente
+        não pode entrar numa célula ocupada por outro (exceto a do farol): conta como colisão.
+        """
+        self.ocupacao = OcupacaoAgentes(self.posicoes_agentes)
+        self.bloquear_agentes = bloquear
 
-    def adicionar_obstaculos(self, dificuldade: int = 1):
+    def definir_posicao(self, agente, pos):
+        """Coloca o agente em pos sem registar movimento (mantém a ocupação coerente)."""
+        if self.ocupacao is not None:
+            self.ocupacao.mover(agente, self.posicoes_agentes[agente], pos)
+        self.posicoes_agentes[agente] = pos
+
+    def _ocupada_por_outro(self, pos, agente) -> bool:
+        return pos != self.farol and self.ocupacao.ocupada(pos, exceto=agente)
+
+    def adicionar_obstaculos(self, dificuldade: int = 1, semente=None):
         pass
+
+    def mascara_exclusao(self):
+        """Grelha (altura, largura) das posições onde não pode haver obstáculos: agentes, farol e vizinhos."""
+        centros = list(self.posicoes_agentes.values())
+        if self.farol:
+            centros.append(self.farol)
+        mascara = np.zeros((self.altura, self.largura), dtype=bool)
+        if not centros:
+            return mascara
+        vizinhos = np.array(centros)[:, None, :] + np.array([(0, 0), (1, 0), (-1, 0), (0, 1), (0, -1)])
+        xs, ys = vizinhos[..., 0].ravel(), vizinhos[..., 1].ravel()
+        dentro = (xs >= 0) & (xs < self.largura) & (ys >= 0) & (ys < self.altura)
+        mascara[ys[dentro], xs[dentro]] = True
+        return mascara
+
+    def adicionar_obstaculos_grelha(self, mascara):
+        """Acrescenta de uma só vez os obstáculos das posições a True (por linhas, como adicionar_obstaculo)."""
+        self._separar_estrutura()
+        ys, xs = np.nonzero(mascara & ~self.grelha_obstaculos)
+        novos = [Obstaculo(x, y) for x, y in zip(xs.tolist(), ys.tolist())]
+        self.obstaculos.extend(novos)
+        self.posicoes_obstaculos.update((o.dx, o.dy) for o in novos)
+        self.grelha_obstaculos[ys, xs] = True
+        self._obstaculos_alterados()
+
+    def _obstaculos_alterados(self):
+        """Invalida tudo o que depende dos obstáculos (tabelas, observações e lista do Visualizador)."""
+        self._tabelas_inputs = {}
+        self._observacoes = {}
+        self._lista_obstaculos = None
+        self.versao_obstaculos += 1
+
+    def _separar_estrutura(self):
+        """Cópia própria dos obstáculos partilhados com clones, antes de os alterar."""
+        if self._estrutura_partilhada:
+            self.obstaculos = list(self.obstaculos)
+            self.posicoes_obstaculos = set(self.posicoes_obstaculos)
+            self.grelha_obstaculos = self.grelha_obstaculos.copy()
+            self._estrutura_partilhada = False
+
+    def adicionar_obstaculo(self, obstaculo):
+        """Regista um obstáculo na lista e no índice de ocupação."""
+        self._separar_estrutura()
+        self.obstaculos.append(obstaculo)
+        self.posicoes_obstaculos.add((obstaculo.dx, obstaculo.dy))
+        if 0 <= obstaculo.dx < self.largura and 0 <= obstaculo.dy < self.altura:
+            self.grelha_obstaculos[obstaculo.dy, obstaculo.dx] = True
+        self._obstaculos_alterados()
+
+    def definir_obstaculos(self, posicoes):
+        """Substitui todos os obstáculos pelos das posições (x, y) dadas."""
+        self.obstaculos = []
+        self.posicoes_obstaculos = set()
+        self.grelha_obstaculos = np.zeros((self.altura, self.largura), dtype=bool)
+        self._estrutura_partilhada = False
+        self._obstaculos_alterados()
+        for x, y in posicoes:
+            self.adicionar_obstaculo(Obstaculo(x, y))
+
+    def copiar_obstaculos(self, grelha, posicoes, obstaculos):
+        """
+        Substitui os obstáculos por estruturas já construídas (ex.: de um MazeCompilado):
+        só copia a grelha, o conjunto de posições e a lista, sem criar objetos.
+        """
+        self.grelha_obstaculos = np.array(grelha, dtype=bool)
+        self.posicoes_obstaculos = set(posicoes)
+        self.obstaculos = list(obstaculos)
+        self._estrutura_partilhada = False
+        self._obstaculos_alterados()
+
+    def tem_obstaculo(self, x, y) -> bool:
+        return (x, y) in self.posicoes_obstaculos
     
     def _calcular_distancia(self, pos1, pos2):
         return math.sqrt((pos1[0] - pos2[0])**2 + (pos1[1] - pos2[1])**2)
@@ -36,7 +159,9 @@ class AmbienteBase():
         """
         pos = self.posicoes_agentes.get(agente)
         if not pos: return [0]*12
-        
+        return self._calcular_inputs_neurais(pos, agente.sensores)
+
+    def _calcular_inputs_neurais(self, pos, sensores):
         x, y = pos
         
         # 1. Sensores de Parede (Distância normalizada)
@@ -66,27 +191,59 @@ class AmbienteBase():
         # 3. Sensores de Obstáculos
         o_norte = o_sul = o_oeste = o_este = 0.0
         
-        for sensor in agente.sensores:
+        for sensor in sensores:
             posicoes_sondadas = self.posicoes_sondadas(sensor, pos)
             for px, py in posicoes_sondadas:
-                for obstaculo in self.obstaculos:
-                    if (obstaculo.dx, obstaculo.dy) == (px, py):
-                        if py < y:  # obstáculo a norte
-                            o_norte = 1.0
-                        elif py > y:  # obstáculo a sul
-                            o_sul = 1.0
-                        if px < x:  # obstáculo a oeste
-                            o_oeste = 1.0
-                        elif px > x:  # obstáculo a este
-                            o_este = 1.0
-                        break
+                if (px, py) in self.posicoes_obstaculos:
+                    if py < y:  # obstáculo a norte
+                        o_norte = 1.0
+                    elif py > y:  # obstáculo a sul
+                        o_sul = 1.0
+                    if px < x:  # obstáculo a oeste
+                        o_oeste = 1.0
+                    elif px > x:  # obstáculo a este
+                        o_este = 1.0
         
         return [s_norte, s_sul, s_oeste, s_este, r_norte, r_sul, r_oeste, r_este, o_norte, o_sul, o_oeste, o_este]
+
+    def _chave_sensores(self, sensores):
+        """Chave por valor (dx, dy, movimentos) de uma lista de sensores, guardada por identidade dos sensores."""
+        ids = tuple(sensores)
+        chave = self._chaves_sensores.get(ids)
+        if chave is None:
+            chave = tuple((s.direcao_accao.dx, s.direcao_accao.dy, s.movimentos) for s in sensores)
+            self._chaves_sensores[ids] = chave
+        return chave
+
+    def tabela_inputs_neurais(self, sensores):
+        """
+        Devolve um array (altura, largura, 12) com os inputs neurais de cada célula
+        para esta configuração de sensores. Num ambiente estático os inputs só dependem
+        da posição, por isso a tabela é calculada uma vez e reutilizada até os obstáculos mudarem.
+        """
+        chave = (self.farol, self._chave_sensores(sensores))
+
+        tabela = self._tabelas_inputs.get(chave)
+        if tabela is None:
+            tabela = np.empty((self.altura, self.largura, 12))
+            for y in range(self.altura):
+                for x in range(self.largura):
+                    tabela[y, x] = self._calcular_inputs_neurais((x, y), sensores)
+            self._tabelas_inputs[chave] = tabela
+        return tabela
+
+    def inputs_neurais_tabelados(self, agente: AgenteBase):
+        """Igual a get_inputs_neurais, mas lido da tabela pré-calculada."""
+        pos = self.posicoes_agentes.get(agente)
+        if not pos: return [0]*12
+        x, y = pos
+        if not (0 <= x < self.largura and 0 <= y < self.altura):
+            return self._calcular_inputs_neurais(pos, agente.sensores)
+        return self.tabela_inputs_neurais(agente.sensores)[y, x]
     
     def posicoes_sondadas(self, sensor, pos_atual):
-        dx, dy = sensor.direcao_accao.dx, sensor.direcao_accao.dy
-        return [(pos_atual[0] + dx * passo, pos_atual[1] + dy * passo) 
-                for passo in range(1, sensor.movimentos + 1)]
+        x, y = pos_atual
+        return [(x + dx, y + dy) for dx, dy in sensor.desvios]
     
     def agir(self, accao: Accao, agente: AgenteBase):
         pos_atual = self.posicoes_agentes.get(agente)
@@ -106,7 +263,10 @@ class AmbienteBase():
         novo_x = max(0, min(self.largura - 1, x + accao.dx))
         novo_y = max(0, min(self.altura - 1, y + accao.dy))
 
-        colidiu = any((o.dx, o.dy) == (novo_x, novo_y) for o in self.obstaculos)
+        colidiu = (novo_x, novo_y) in self.posicoes_obstaculos
+        bloquear = self.bloquear_agentes
+        if bloquear and not colidiu:
+            colidiu = self._ocupada_por_outro((novo_x, novo_y), agente)
 
         if colidiu:
             tentativas = 0
@@ -114,48 +274,73 @@ class AmbienteBase():
                 accao = agente.registar_colisao(accao)
                 novo_x = max(0, min(self.largura - 1, x + accao.dx))
                 novo_y = max(0, min(self.altura - 1, y + accao.dy))
-                if not any((o.dx, o.dy) == (novo_x, novo_y) for o in self.obstaculos):
+                if (novo_x, novo_y) not in self.posicoes_obstaculos and not (
+                        bloquear and self._ocupada_por_outro((novo_x, novo_y), agente)):
+                    if self.estatisticas is not None:
+                        self.estatisticas.contar("sondagens_obstaculos", tentativas + 2)
                     self._atualizar_posicao(agente, novo_x, novo_y, accao)
                     return
                 tentativas += 1
+            if self.estatisticas is not None:
+                self.estatisticas.contar("sondagens_obstaculos", tentativas + 1)
         else:
+            if self.estatisticas is not None:
+                self.estatisticas.contar("sondagens_obstaculos")
             self._atualizar_posicao(agente, novo_x, novo_y, accao)
     
     def _atualizar_posicao(self, agente, novo_x, novo_y, accao):
+        if self.ocupacao is not None:
+            self.ocupacao.mover(agente, self.posicoes_agentes[agente], (novo_x, novo_y))
         self.posicoes_agentes[agente] = (novo_x, novo_y)
-        self.historico_paths[agente].append((novo_x, novo_y))
+        if self.farol == (novo_x, novo_y):
+            self.chegadas.append(agente)
+        # O agente fica nesta posição no fim do passo atual
+        self.historico_paths[agente].append((novo_x, novo_y), self.passo_atual + 1)
         self.ultimas_acoes[agente] = accao
     
-    def observacaoPara(self, agente: AgenteBase) -> Observacao:
+    def observacaoPara(self, agente: AgenteBase, campos=None) -> Observacao:
+        """
+        As observações são imutáveis e só dependem da posição, dos sensores e do farol: a mesma
+        Observacao é reutilizada por todos os agentes e passos até os obstáculos mudarem.
+        Os resultados dos sensores só são calculados quando alguma política os lê. 'campos' são
+        os campos de que a política precisa (Politica.campos_observacao); vazio devolve SEM_OBSERVACAO.
+        """
+        if campos is not None and not campos:
+            return SEM_OBSERVACAO
         pos_atual = self.posicoes_agentes.get(agente)
         if pos_atual is None:
             return Observacao(posicao_atual=None)
-        
+
+        chave = (self.farol, self._chave_sensores(agente.sensores))
+        por_posicao = self._observacoes.get(chave)
+        if por_posicao is None:
+            por_posicao = self._observacoes[chave] = {}
+        obs = por_posicao.get(pos_atual)
+        if obs is None:
+            if len(por_posicao) >= LIMITE_OBSERVACOES:
+                por_posicao.clear()
+            # Os obstáculos e o farol são fixados agora: um clone pode herdar esta cache
+            sensores, obstaculos, farol = tuple(agente.sensores), self.posicoes_obstaculos, self.farol
+            obs = por_posicao[pos_atual] = Observacao(
+                pos_atual, calcular=lambda: self._resultados_sensores(pos_atual, sensores, obstaculos, farol))
+        return obs
+
+    def _resultados_sensores(self, pos_atual, sensores, obstaculos, farol) -> list:
+        x, y = pos_atual
         resultados_sensores = []
-        for sensor in agente.sensores:
-            posicoes_sondadas = self.posicoes_sondadas(sensor, pos_atual)
-            
-            obstaculos_detectados = False
-            for pos in posicoes_sondadas:
-                for obstaculo in self.obstaculos:
-                    if (obstaculo.dx, obstaculo.dy) == pos:
-                        obstaculos_detectados = True
-                        break
-                if obstaculos_detectados:
-                    break
-            
+        for sensor in sensores:
+            if self.estatisticas is not None:
+                self.estatisticas.contar("sondagens_sensores", sensor.movimentos)
+            obstaculos_detectados = any((x + dx, y + dy) in obstaculos for dx, dy in sensor.desvios)
+
             if obstaculos_detectados:
                 recompensa_sondada = -999
             else:
-                pos_final = posicoes_sondadas[-1] 
-                recompensa_sondada = -self._calcular_distancia(pos_final, self.farol)
-            
-            resultados_sensores.append({
-                'accao_base': sensor.direcao_accao,
-                'recompensa_sondada': recompensa_sondada
-            })
-        
-        return Observacao(posicao_atual=pos_atual, resultados_sensores=resultados_sensores)
+                dx, dy = sensor.desvios[-1]
+                recompensa_sondada = -self._calcular_distancia((x + dx, y + dy), farol)
+
+            resultados_sensores.append(ResultadoSensor(sensor.direcao_accao, recompensa_sondada))
+        return resultados_sensores
     
     def agente_no_farol(self, agente: AgenteBase) -> bool:
         pos = self.posicoes_agentes.get(agente)
@@ -176,16 +361,65 @@ class AmbienteBase():
         return 0
     
     def get_estado_visualizacao(self) -> dict:
+        # A lista de obstáculos só é reconstruída quando os obstáculos mudam
+        if self._lista_obstaculos is None:
+            self._lista_obstaculos = [(o.dx, o.dy) for o in self.obstaculos]
         return {
             "largura": self.largura,
             "altura": self.altura,
             "farol": self.farol,
             "agentes": list(self.posicoes_agentes.values()),
-            "obstaculos": [(o.dx, o.dy) for o in self.obstaculos]
+            "obstaculos": self._lista_obstaculos,
+            "versao_obstaculos": self.versao_obstaculos
         }
     
     def reset(self):
         self.posicoes_agentes = {}
         self.historico_paths = {}
         self.ultimas_acoes = {}
-        self.passo_atual = 0
\ No newline at end of file
+        self._chaves_sensores = {}
+        self.chegadas = []
+        self.passo_atual = 0
+        if self.ocupacao is not None:
+            self.ocupacao = OcupacaoAgentes()
+
+    def instantaneo(self) -> dict:
+        """
+        Estado dinâmico: posições, trajetórias, últimas ações, passo e o que o ambiente
+        altera nos agentes (colisões, chegada ao farol). A estrutura estática (obstáculos,
+        farol, tabelas de inputs) não é copiada.
+        """
+        return {
+            "posicoes_agentes": dict(self.posicoes_agentes),
+            "historico_paths": {a: t.copia() for a, t in self.historico_paths.items()},
+            "ultimas_acoes": dict(self.ultimas_acoes),
+            "passo_atual": self.passo_atual,
+            "agentes": {a: (a.colisoes, a.agente_no_farol) for a in self.posicoes_agentes},
+            "versao_obstaculos": self.versao_obstaculos,
+        }
+
+    def restaurar(self, instantaneo: dict):
+        """Volta ao estado de instantaneo() (que pode ser restaurado várias vezes)."""
+        if instantaneo["versao_obstaculos"] != self.versao_obstaculos:
+            raise ValueError("O instantâneo é de antes de os obstáculos mudarem")
+        self.posicoes_agentes = dict(instantaneo["posicoes_agentes"])
+        self.historico_paths = {a: t.copia() for a, t in instantaneo["historico_paths"].items()}
+        self.ultimas_acoes = dict(instantaneo["ultimas_acoes"])
+        self.passo_atual = instantaneo["passo_atual"]
+        self.chegadas = []
+        if self.ocupacao is not None:
+            self.ocupacao = OcupacaoAgentes(self.posicoes_agentes)
+        for agente, (colisoes, no_farol) in instantaneo["agentes"].items():
+            agente.colisoes = colisoes
+            agente.agente_no_farol = no_farol
+
+    def clonar(self):
+        """
+        Novo ambiente que partilha a estrutura estática (obstáculos, farol, tabelas de inputs)
+        e tem uma cópia do estado dinâmico (os agentes são os mesmos objetos). Alterar os
+        obstáculos num deles não afeta o outro.
+        """
+        clone = copy.copy(self)
+        self._estrutura_partilhada = clone._estrutura_partilhada = True
+        clone.restaurar(self.instantaneo())
+        return clone
\ No newline at end of file
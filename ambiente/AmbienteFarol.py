@@ -1,5 +1,6 @@
+import random
+import numpy as np
 from ambiente.AmbienteBase import AmbienteBase
-from ambiente.Obstaculos import Obstaculo
 from agentes.Agente import AgenteBase
 
 class AmbienteFarol(AmbienteBase):
@@ -8,10 +9,14 @@ class AmbienteFarol(AmbienteBase):
         # Posição do farol
         self.farol = (largura-2, altura-2)
     
-    def adicionar_obstaculos(self, dificuldade: int = None):
+    def adicionar_obstaculos(self, dificuldade: int = None, semente=None):
+        """
+        Cada célula recebe um obstáculo com probabilidade min(0.05 * dif, 0.9), exceto nos
+        agentes, no farol e nos seus vizinhos. A grelha aleatória é sorteada de uma só vez;
+        sem semente, esta é tirada do módulo random (random.seed continua a fixar o mapa).
+        """
         dif = dificuldade or self.dificuldade
-        for i in range(self.altura):
-            for j in range(self.largura):
-                obst = Obstaculo(j, i)
-                if obst.colocar(dif, self):
-                    self.obstaculos.append(obst)
\ No newline at end of file
+        prob = min(0.05 * dif, 0.9)
+        rng = np.random.default_rng(random.getrandbits(64) if semente is None else semente)
+        sorteio = rng.random((self.altura, self.largura)) < prob
+        self.adicionar_obstaculos_grelha(sorteio & ~self.mascara_exclusao())
@@ -0,0 +1,113 @@
+import numpy as np
+from ambiente.AmbienteBase import AmbienteBase
+
+class AmbienteLote:
+    """
+    Versão vetorizada do AmbienteBase para populações grandes.
+    O estado de todos os agentes vive em arrays NumPy (um agente por linha) e
+    cada passo aplica as mesmas regras de AmbienteBase.agir / AgenteBase.registar_colisao
+    a todos os agentes de uma só vez. A estrutura estática (dimensões, obstáculos e farol)
+    é lida do ambiente escalar passado no construtor.
+    """
+    def __init__(self, ambiente: AmbienteBase, posicoes_iniciais):
+        self.ambiente = ambiente
+        self.largura = ambiente.largura
+        self.altura = ambiente.altura
+        self.farol = ambiente.farol
+        self.grelha_obstaculos = ambiente.grelha_obstaculos
+
+        n = len(posicoes_iniciais)
+        self.num_agentes = n
+        self.posicoes = np.array(posicoes_iniciais, dtype=np.int64).reshape(n, 2)
+        self.ultimas_acoes = np.zeros((n, 2), dtype=np.int64)
+        self.tem_ultima_accao = np.zeros(n, dtype=bool)
+        self.colisoes = np.zeros(n, dtype=np.int64)
+        self.no_farol = np.zeros(n, dtype=bool)
+        # Equivalente a len(historico_paths[agente]) no ambiente escalar
+        self.comprimento_caminho = np.ones(n, dtype=np.int64)
+        self.passo_atual = 0
+
+    def agir(self, acoes):
+        """
+        Aplica um array (n, 2) de ações (dx, dy) a todos os agentes.
+        Agentes que já chegaram ao farol ficam parados, tal como em AgenteBase.age.
+        """
+        acoes = np.asarray(acoes, dtype=np.int64)
+        dx = acoes[:, 0].copy()
+        dy = acoes[:, 1].copy()
+        x = self.posicoes[:, 0]
+        y = self.posicoes[:, 1]
+
+        a_mover = ((dx != 0) | (dy != 0)) & ~self.no_farol
+
+        # Bloquear movimentos opostos
+        oposto = (a_mover & self.tem_ultima_accao
+                  & (dx == -self.ultimas_acoes[:, 0]) & (dy == -self.ultimas_acoes[:, 1]))
+        dx, dy = self._rodar(dx, dy, oposto)
+
+        # Movimento fora dos limites
+        fora = a_mover & ((x + dx < 0) | (x + dx >= self.largura) | (y + dy < 0) | (y + dy >= self.altura))
+        dx, dy = self._rodar(dx, dy, fora)
+
+        novo_x = np.clip(x + dx, 0, self.largura - 1)
+        novo_y = np.clip(y + dy, 0, self.altura - 1)
+        colidiu = a_mover & self.grelha_obstaculos[novo_y, novo_x]
+        atualizar = a_mover & ~colidiu
+
+        self.colisoes += oposto
+        self.colisoes += fora
+
+        # Até 4 rotações para contornar o obstáculo
+        pendentes = colidiu
+        tentativas = 0
+        while tentativas < 4 and pendentes.any():
+            self.colisoes += pendentes
+            dx, dy = self._rodar(dx, dy, pendentes)
+            novo_x = np.where(pendentes, np.clip(x + dx, 0, self.largura - 1), novo_x)
+            novo_y = np.where(pendentes, np.clip(y + dy, 0, self.altura - 1), novo_y)
+            livres = pendentes & ~self.grelha_obstaculos[novo_y, novo_x]
+            atualizar |= livres
+            pendentes = pendentes & ~livres
+            tentativas += 1
+
+        self.posicoes[atualizar, 0] = novo_x[atualizar]
+        self.posicoes[atualizar, 1] = novo_y[atualizar]
+        self.ultimas_acoes[atualizar, 0] = dx[atualizar]
+        self.ultimas_acoes[atualizar, 1] = dy[atualizar]
+        self.tem_ultima_accao |= atualizar
+        self.comprimento_caminho += atualizar
+
+    def _rodar(self, dx, dy, mascara):
+        # Mesma rotação de AgenteBase.registar_colisao: (dx, dy) -> (-dy, dx)
+        return np.where(mascara, -dy, dx), np.where(mascara, dx, dy)
+
+    def atualizacao(self):
+        self.passo_atual += 1
+
+    def verificar_farol(self) -> int:
+        """Marca os agentes que estão no farol e devolve quantos já chegaram."""
+        if self.farol is not None:
+            fx, fy = self.farol
+            self.no_farol |= (self.posicoes[:, 0] == fx) & (self.posicoes[:, 1] == fy)
+        return int(self.no_farol.sum())
+
+    def distancias_ao_farol(self):
+        """Versão vetorizada de AmbienteBase.dist_to_exit."""
+        if not self.farol:
+            return np.full(self.num_agentes, 1000.0)
+        fx, fy = self.farol
+        return np.sqrt((self.posicoes[:, 0] - fx) ** 2 + (self.posicoes[:, 1] - fy) ** 2)
+
+    def posicoes_finais(self):
+        return [(int(x), int(y)) for x, y in self.posicoes]
+
+    def executa(self, decidir, max_passos: int):
+        """
+        Ciclo equivalente a MotorDeSimulacao.executa sem visualização.
+        'decidir' recebe este ambiente e devolve o array (n, 2) de ações do passo.
+        """
+        while self.passo_atual < max_passos:
+            self.agir(decidir(self))
+            self.atualizacao()
+            if self.verificar_farol() == self.num_agentes:
+                break
@@ -1,30 +1,21 @@
 import os
 from ambiente.AmbienteBase import AmbienteBase
-from ambiente.Obstaculos import Obstaculo
+from ambiente.MazeCompilado import abrir_maze
 
 class AmbienteMaze(AmbienteBase):
-    def __init__(self, dificuldade=1):
-        self.maze_matrix = self.ler_maze(str(dificuldade))
-        self.largura = len(self.maze_matrix[0])
-        self.altura = len(self.maze_matrix) 
+    def __init__(self, dificuldade=1, ficheiro=None):
+        # ficheiro: outro labirinto (.txt ou .maze.npz, ex.: gerado com ambiente/GeradorMazes.py)
+        # em vez de mazes/dificuldadeN.txt
+        if ficheiro is None:
+            ficheiro = os.path.join("mazes", f"dificuldade{dificuldade}.txt")
+        # O ficheiro só é processado uma vez por processo (e fica em cache em disco, em *.maze.npz)
+        self.maze = abrir_maze(ficheiro)
+        self.largura = self.maze.largura
+        self.altura = self.maze.altura
         super().__init__(self.largura, self.altura, dificuldade)
         self.construir_maze()
     
-    def ler_maze(self, dificuldade):
-        matriz = []
-        caminho_completo=os.path.join("mazes", f"dificuldade{dificuldade}.txt")
-        with open(caminho_completo, "r") as f:
-            for linha in f:
-                linha = linha.strip()
-                if linha:
-                    matriz.append(linha.split(","))
-        return matriz
-    
     def construir_maze(self):
-        for y in range(self.altura):
-            for x in range(self.largura):
-                if self.maze_matrix[y][x] == "X":
-                    self.obstaculos.append(Obstaculo(x, y))
-                elif self.maze_matrix[y][x] == "1":
-                    self.farol = (x, y)
+        self.copiar_obstaculos(self.maze.paredes, self.maze.posicoes, self.maze.obstaculos)
+        self.farol = self.maze.farol
     
\ No newline at end of file
@@ -0,0 +1,216 @@
+import argparse
+import hashlib
+import random
+from collections import deque
+import numpy as np
+from ambiente.MazeCompilado import MazeCompilado, caminho_compilado
+
+# Posição inicial dos agentes em todos os scripts (tem de ficar livre e ligada ao objetivo)
+INICIO = (1, 1)
+TAMANHO_MINIMO = 5
+
+# Vizinhos de uma célula na grelha de células (cada célula ocupa a posição (2cx+1, 2cy+1))
+_DIRECOES = ((0, -1), (0, 1), (-1, 0), (1, 0))
+
+
+def _labirinto_perfeito(largura, altura, rng):
+    """
+    Árvore de caminhos (exatamente um caminho entre quaisquer duas células) por
+    backtracking iterativo. Devolve a grelha de paredes (altura, largura).
+    """
+    celulas_x, celulas_y = (largura - 1) // 2, (altura - 1) // 2
+    # Índices planos: célula i = cy * celulas_x + cx está na posição (2cy+1) * largura + 2cx+1
+    livres = bytearray(altura * largura)
+    visitada = bytearray(celulas_x * celulas_y)
+    posicao = [(2 * (i // celulas_x) + 1) * largura + 2 * (i % celulas_x) + 1 for i in range(celulas_x * celulas_y)]
+    visitada[0] = 1
+    livres[posicao[0]] = 1
+    pilha = [0]
+    while pilha:
+        i = pilha[-1]
+        cx = i % celulas_x
+        vizinhos = []
+        if i >= celulas_x and not visitada[i - celulas_x]:
+            vizinhos.append(i - celulas_x)
+        if i + celulas_x < len(visitada) and not visitada[i + celulas_x]:
+            vizinhos.append(i + celulas_x)
+        if cx > 0 and not visitada[i - 1]:
+            vizinhos.append(i - 1)
+        if cx + 1 < celulas_x and not visitada[i + 1]:
+            vizinhos.append(i + 1)
+        if not vizinhos:
+            pilha.pop()
+            continue
+        j = vizinhos[rng.randrange(len(vizinhos))] if len(vizinhos) > 1 else vizinhos[0]
+        visitada[j] = 1
+        livres[posicao[j]] = 1
+        livres[(posicao[i] + posicao[j]) // 2] = 1  # parede entre as duas células
+        pilha.append(j)
+    return np.frombuffer(livres, dtype=np.uint8).reshape(altura, largura) == 0
+
+
+def _distancias(paredes, origem):
+    """
+    Distância (em passos) de cada posição livre a 'origem'; -1 nas inalcançáveis.
+    A moldura é sempre parede, por isso os vizinhos de uma posição livre estão dentro da grelha.
+    """
+    altura, largura = paredes.shape
+    fechado = bytearray(paredes.tobytes())  # paredes e posições já visitadas
+    distancia = [-1] * (altura * largura)
+    inicio = origem[1] * largura + origem[0]
+    distancia[inicio] = 0
+    fechado[inicio] = 1
+    fila = deque([inicio])
+    while fila:
+        i = fila.popleft()
+        d = distancia[i] + 1
+        for j in (i - largura, i + largura, i - 1, i + 1):
+            if not fechado[j]:
+                fechado[j] = 1
+                distancia[j] = d
+                fila.append(j)
+    return np.array(distancia, dtype=np.int64).reshape(altura, largura)
+
+
+def _caminho(distancias_objetivo, inicio):
+    """Caminho mais curto de 'inicio' ao objetivo, a descer pelas distâncias ao objetivo."""
+    altura, largura = distancias_objetivo.shape
+    x, y = inicio
+    caminho = [(x, y)]
+    while distancias_objetivo[y, x] > 0:
+        for dx, dy in _DIRECOES:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < largura and 0 <= ny < altura and distancias_objetivo[ny, nx] == distancias_objetivo[y, x] - 1:
+                x, y = nx, ny
+                break
+        caminho.append((x, y))
+    return caminho
+
+
+def _beco_enganador(paredes, farol, rng):
+    """
+    Transforma o troço final do caminho certo num beco sem saída junto ao objetivo: corta o
+    caminho perto do fim e volta a ligar as duas partes por uma parede mais longe do objetivo.
+    O labirinto continua a ter um só caminho entre cada par de células.
+    """
+    caminho = _caminho(_distancias(paredes, farol), INICIO)
+    # Só as posições de ligação entre células (uma coordenada par) podem ser fechadas
+    cortes = [p for p in caminho[len(caminho) * 2 // 3:-2] if (p[0] + p[1]) % 2 == 1]
+    if not cortes:
+        return False
+    corte = cortes[rng.randrange(len(cortes))]
+    paredes[corte[1], corte[0]] = True
+
+    lado_objetivo = _distancias(paredes, farol) >= 0
+    lado_inicio = ~paredes & ~lado_objetivo
+    candidatas = _ligacoes(paredes, lado_inicio, lado_objetivo)
+    candidatas[corte[1], corte[0]] = False
+    ys, xs = np.nonzero(candidatas)
+    if len(xs) == 0:
+        paredes[corte[1], corte[0]] = False
+        return False
+    # Preferir religar longe do objetivo, para o beco ficar mais perto dele do que a nova entrada
+    longe = np.abs(xs - farol[0]) + np.abs(ys - farol[1]) > abs(corte[0] - farol[0]) + abs(corte[1] - farol[1])
+    if longe.any():
+        xs, ys = xs[longe], ys[longe]
+    escolhida = rng.randrange(len(xs))
+    paredes[ys[escolhida], xs[escolhida]] = False
+    return True
+
+
+def _ligacoes(paredes, a, b):
+    """Paredes de ligação entre duas células (uma coordenada par) com 'a' de um lado e 'b' do outro."""
+    entre = np.zeros_like(paredes)
+    entre[:, 1:-1] |= (a[:, :-2] & b[:, 2:]) | (b[:, :-2] & a[:, 2:])
+    entre[1:-1, :] |= (a[:-2, :] & b[2:, :]) | (b[:-2, :] & a[2:, :])
+    ys, xs = np.indices(paredes.shape)
+    return entre & paredes & ((xs + ys) % 2 == 1)
+
+
+def _salas(paredes, num_salas, rng):
+    """Abre retângulos (alinhados com as células) dentro do labirinto."""
+    altura, largura = paredes.shape
+    celulas_x, celulas_y = (largura - 1) // 2, (altura - 1) // 2
+    lado_maximo = max(3, min(largura, altura) // 6)
+    for _ in range(num_salas):
+        w = min(rng.randrange(3, lado_maximo + 1, 2), 2 * celulas_x - 1)
+        h = min(rng.randrange(3, lado_maximo + 1, 2), 2 * celulas_y - 1)
+        x = 2 * rng.randrange(celulas_x - (w + 1) // 2 + 1) + 1
+        y = 2 * rng.randrange(celulas_y - (h + 1) // 2 + 1) + 1
+        paredes[y:y + h, x:x + w] = False
+
+
+def _lacos(paredes, fracao, semente):
+    """Abre uma fração das paredes entre duas células livres (cria caminhos alternativos)."""
+    livres = ~paredes
+    ys, xs = np.nonzero(_ligacoes(paredes, livres, livres))
+    abrir = np.random.default_rng(semente).random(len(xs)) < fracao
+    paredes[ys[abrir], xs[abrir]] = False
+
+
+def gerar_paredes(largura, altura, semente=None, lacos=0.0, becos=0, salas=0, farol=None):
+    """
+    Grelha de paredes (altura, largura) e objetivo de um labirinto gerado a partir da semente.
+    - lacos: fração (0 a 1) das paredes interiores abertas (0 = labirinto perfeito);
+    - becos: nº de becos enganadores (o caminho certo é cortado perto do objetivo);
+    - salas: nº de salas (retângulos abertos);
+    - farol: objetivo; por omissão a posição livre mais distante de (1, 1).
+    O objetivo é sempre alcançável a partir de (1, 1).
+    """
+    if largura < TAMANHO_MINIMO or altura < TAMANHO_MINIMO:
+        raise ValueError(f"O labirinto tem de ter pelo menos {TAMANHO_MINIMO}x{TAMANHO_MINIMO}")
+    semente = random.getrandbits(32) if semente is None else semente
+    rng = random.Random(semente)
+
+    paredes = _labirinto_perfeito(largura, altura, rng)
+    if farol is None:
+        distancias = _distancias(paredes, INICIO)
+        y, x = np.unravel_index(np.argmax(distancias), distancias.shape)
+        farol = (int(x), int(y))
+    elif not (0 <= farol[0] < largura and 0 <= farol[1] < altura):
+        raise ValueError(f"O objetivo {farol} está fora do labirinto {largura}x{altura}")
+    elif paredes[farol[1], farol[0]] or farol == INICIO:
+        raise ValueError(f"O objetivo {farol} tem de ser uma célula livre (coordenadas ímpares) diferente de {INICIO}")
+    for _ in range(becos):
+        _beco_enganador(paredes, farol, rng)
+    _salas(paredes, salas, rng)
+    if lacos > 0:
+        _lacos(paredes, lacos, semente)
+    # Abrir paredes nunca desliga o objetivo e os becos voltam a ligar o labirinto; confirmar custa uma pesquisa
+    if _distancias(paredes, INICIO)[farol[1], farol[0]] <= 0:
+        raise RuntimeError(f"O objetivo {farol} ficou inalcançável a partir de {INICIO} (semente {semente})")
+    return paredes, farol
+
+
+def gerar_maze(caminho, largura, altura, semente=None, lacos=0.0, becos=0, salas=0, farol=None, binario=True):
+    """
+    Gera o labirinto, grava-o em 'caminho' no formato de mazes/ e, com binario=True, também
+    a versão compilada (caminho.maze.npz), que o AmbienteMaze usa sem voltar a ler o texto.
+    Devolve o MazeCompilado.
+    """
+    paredes, farol = gerar_paredes(largura, altura, semente, lacos, becos, salas, farol)
+    maze = MazeCompilado(paredes, farol, None)
+    conteudo = maze.para_texto().encode("utf-8")
+    maze.hash = hashlib.sha1(conteudo).hexdigest()
+    with open(caminho, "wb") as f:
+        f.write(conteudo)
+    if binario:
+        maze.guardar(caminho_compilado(caminho))
+    return maze
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera um labirinto para o AmbienteMaze (formato de mazes/)")
+    parser.add_argument("ficheiro", help="ficheiro .txt de saída")
+    parser.add_argument("--largura", type=int, default=15)
+    parser.add_argument("--altura", type=int, default=15)
+    parser.add_argument("--semente", type=int, default=None)
+    parser.add_argument("--lacos", type=float, default=0.0, help="fração de paredes interiores abertas")
+    parser.add_argument("--becos", type=int, default=0, help="nº de becos enganadores junto ao objetivo")
+    parser.add_argument("--salas", type=int, default=0)
+    parser.add_argument("--sem-binario", action="store_true", help="não grava o .maze.npz")
+    args = parser.parse_args()
+
+    maze = gerar_maze(args.ficheiro, args.largura, args.altura, args.semente, args.lacos,
+                      args.becos, args.salas, binario=not args.sem_binario)
+    print(f"{args.ficheiro}: {maze.largura}x{maze.altura}, objetivo em {maze.farol}")
@@ -0,0 +1,136 @@
+import hashlib
+import os
+from functools import cached_property
+import numpy as np
+from ambiente.Obstaculos import Obstaculo
+
+# Guardar a versão compilada em disco, ao lado do .txt (dificuldadeN.txt -> dificuldadeN.maze.npz)
+CACHE_DISCO = True
+VERSAO_FORMATO = 1
+
+class MazeCompilado:
+    """
+    Labirinto já processado: grelha de paredes (altura, largura), posição do objetivo e,
+    para os ambientes, as estruturas derivadas (conjunto de posições e objetos Obstaculo)
+    que são partilhadas por todos os AmbienteMaze construídos a partir do mesmo ficheiro.
+    """
+    def __init__(self, paredes, farol, hash_conteudo):
+        self.paredes = paredes
+        self.paredes.setflags(write=False)
+        self.altura, self.largura = paredes.shape
+        self.farol = farol
+        self.hash = hash_conteudo
+
+    # Só construídas quando um ambiente as pede (um labirinto gerado só para ficheiro não precisa delas)
+    @cached_property
+    def _coordenadas(self):
+        ys, xs = np.nonzero(self.paredes)  # por linhas, a mesma ordem em que o .txt era percorrido
+        return xs.tolist(), ys.tolist()
+
+    @cached_property
+    def posicoes(self):
+        return frozenset(zip(*self._coordenadas))
+
+    @cached_property
+    def obstaculos(self):
+        return tuple(Obstaculo(x, y) for x, y in zip(*self._coordenadas))
+
+    def para_texto(self) -> str:
+        """Conteúdo no formato dos ficheiros de mazes/ ('X' parede, '0' livre, '1' objetivo)."""
+        celulas = np.where(self.paredes, "X", "0")
+        if self.farol is not None:
+            celulas[self.farol[1], self.farol[0]] = "1"
+        return "\n".join(",".join(linha) for linha in celulas) + "\n"
+
+    @classmethod
+    def de_texto(cls, texto, hash_conteudo):
+        """Formato dos ficheiros de mazes/: uma linha por fila, células separadas por vírgulas ('X' parede, '1' objetivo)."""
+        linhas = [linha.strip().split(",") for linha in texto.splitlines() if linha.strip()]
+        celulas = np.array(linhas)
+        alvo = np.argwhere(celulas == "1")
+        # Como no leitor antigo, se houver vários '1' fica o último
+        farol = (int(alvo[-1][1]), int(alvo[-1][0])) if len(alvo) else None
+        return cls(celulas == "X", farol, hash_conteudo)
+
+    def guardar(self, caminho):
+        """Formato binário: grelha empacotada (1 bit por célula) + objetivo + hash do .txt de origem."""
+        # Escreve num temporário e substitui: outro processo nunca lê um ficheiro a meio
+        temporario = f"{caminho}.{os.getpid()}.tmp"
+        with open(temporario, "wb") as f:
+            np.savez(f, versao=VERSAO_FORMATO, hash=self.hash, forma=np.array(self.paredes.shape),
+                     paredes=np.packbits(self.paredes, axis=None),
+                     farol=np.array(self.farol if self.farol else (-1, -1)))
+        os.replace(temporario, caminho)
+
+    @classmethod
+    def carregar(cls, caminho, hash_esperado):
+        """
+        Lê a versão binária; None se não existir, for de outra versão ou de outro conteúdo
+        (com hash_esperado=None aceita qualquer conteúdo).
+        """
+        try:
+            with np.load(caminho) as dados:
+                hash_conteudo = str(dados["hash"])
+                if int(dados["versao"]) != VERSAO_FORMATO or hash_esperado not in (None, hash_conteudo):
+                    return None
+                forma = tuple(int(v) for v in dados["forma"])
+                paredes = np.unpackbits(dados["paredes"], count=forma[0] * forma[1]).reshape(forma).astype(bool)
+                farol = tuple(int(v) for v in dados["farol"])
+        except (OSError, KeyError, ValueError):
+            return None
+        return cls(paredes, None if farol == (-1, -1) else farol, hash_conteudo)
+
+
+# Cache do processo: hash do conteúdo -> MazeCompilado, e (caminho, mtime, tamanho) -> hash
+_por_hash = {}
+_hash_por_ficheiro = {}
+
+def caminho_compilado(caminho_txt):
+    return os.path.splitext(caminho_txt)[0] + ".maze.npz"
+
+def compilar_maze(caminho_txt, cache_disco=None):
+    """
+    Devolve o MazeCompilado do ficheiro. Um ficheiro inalterado (mesmo mtime e tamanho)
+    não volta a ser lido; um conteúdo já visto não volta a ser processado.
+    """
+    cache_disco = CACHE_DISCO if cache_disco is None else cache_disco
+    estado = os.stat(caminho_txt)
+    chave_ficheiro = (os.path.abspath(caminho_txt), estado.st_mtime_ns, estado.st_size)
+    hash_conteudo = _hash_por_ficheiro.get(chave_ficheiro)
+    if hash_conteudo is not None and hash_conteudo in _por_hash:
+        return _por_hash[hash_conteudo]
+
+    with open(caminho_txt, "rb") as f:
+        conteudo = f.read()
+    hash_conteudo = hashlib.sha1(conteudo).hexdigest()
+    _hash_por_ficheiro[chave_ficheiro] = hash_conteudo
+    maze = _por_hash.get(hash_conteudo)
+    if maze is not None:
+        return maze
+
+    binario = caminho_compilado(caminho_txt)
+    maze = MazeCompilado.carregar(binario, hash_conteudo) if cache_disco else None
+    if maze is None:
+        maze = MazeCompilado.de_texto(conteudo.decode("utf-8"), hash_conteudo)
+        if cache_disco:
+            try:
+                maze.guardar(binario)
+            except OSError:
+                pass  # diretório só de leitura: fica só a cache em memória
+    _por_hash[hash_conteudo] = maze
+    return maze
+
+def abrir_maze(caminho):
+    """Labirinto de um ficheiro de texto (compilado e em cache) ou diretamente de um .maze.npz."""
+    if not caminho.endswith(".npz"):
+        return compilar_maze(caminho)
+    estado = os.stat(caminho)
+    chave_ficheiro = (os.path.abspath(caminho), estado.st_mtime_ns, estado.st_size)
+    maze = _por_hash.get(_hash_por_ficheiro.get(chave_ficheiro))
+    if maze is None:
+        maze = MazeCompilado.carregar(caminho, None)
+        if maze is None:
+            raise ValueError(f"Ficheiro de labirinto inválido: {caminho}")
+        maze = _por_hash.setdefault(maze.hash, maze)
+        _hash_por_ficheiro[chave_ficheiro] = maze.hash
+    return maze
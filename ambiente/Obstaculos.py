@@ -1,9 +1,17 @@
 import random
 
 class Obstaculo:
+    __slots__ = ("dx", "dy")
+
     def __init__(self, dx: int, dy: int):
-        self.dx = dx
-        self.dy = dy
+        object.__setattr__(self, "dx", dx)
+        object.__setattr__(self, "dy", dy)
+
+    def __setattr__(self, nome, valor):
+        raise AttributeError("Obstaculo é imutável")
+
+    def __reduce__(self):
+        return (Obstaculo, (self.dx, self.dy))
     
     def __repr__(self):
         return f"Obstáculo(dx={self.dx}, dy={self.dy})"
@@ -0,0 +1,56 @@
+class OcupacaoAgentes:
+    """
+    Hash espacial dos agentes: célula (x, y) -> lista dos agentes nessa célula.
+    Atualizado a cada movimento (AmbienteBase._atualizar_posicao), dá em O(1) se uma
+    célula está ocupada e, em O(raio²), os agentes à volta de uma posição.
+    """
+    def __init__(self, posicoes_agentes=None):
+        self.celulas = {}
+        for agente, pos in (posicoes_agentes or {}).items():
+            self.adicionar(agente, pos)
+
+    def adicionar(self, agente, pos):
+        lista = self.celulas.get(pos)
+        if lista is None:
+            self.celulas[pos] = [agente]
+        else:
+            lista.append(agente)
+
+    def remover(self, agente, pos):
+        lista = self.celulas.get(pos)
+        if lista is None:
+            return
+        if len(lista) == 1:
+            if lista[0] is agente:
+                del self.celulas[pos]
+        elif agente in lista:
+            lista.remove(agente)
+
+    def mover(self, agente, de, para):
+        if de != para:
+            self.remover(agente, de)
+            self.adicionar(agente, para)
+
+    def ocupada(self, pos, exceto=None) -> bool:
+        """True se houver na célula algum agente (além de 'exceto')."""
+        lista = self.celulas.get(pos)
+        if not lista:
+            return False
+        return len(lista) > 1 or lista[0] is not exceto
+
+    def agentes_em(self, pos) -> list:
+        return list(self.celulas.get(pos, ()))
+
+    def vizinhos(self, pos, raio=1, exceto=None) -> list:
+        """Agentes no quadrado de lado 2*raio+1 centrado em pos."""
+        x, y = pos
+        encontrados = []
+        for cy in range(y - raio, y + raio + 1):
+            for cx in range(x - raio, x + raio + 1):
+                lista = self.celulas.get((cx, cy))
+                if lista:
+                    encontrados.extend(a for a in lista if a is not exceto)
+        return encontrados
+
+    def __len__(self):
+        return sum(len(lista) for lista in self.celulas.values())
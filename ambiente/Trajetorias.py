@@ -0,0 +1,247 @@
+import os
+import tempfile
+import weakref
+import numpy as np
+
+# Um registo por movimento: posição (int16) e passo da simulação em que o agente lá ficou
+REGISTO = np.dtype([("x", "<i2"), ("y", "<i2"), ("passo", "<i4")])
+
+def _remover_ficheiro(caminho):
+    try:
+        os.remove(caminho)
+    except OSError:
+        pass
+
+
+class Trajetoria:
+    """
+    Caminho de um agente guardado em blocos pré-alocados de REGISTO (8 bytes por posição),
+    em vez de uma lista de tuplos. Comporta-se como a lista antiga de historico_paths
+    (len, append, extend, índices, iteração sobre (x, y)).
+    Com 'limite_memoria', os blocos cheios passam para um ficheiro lido por np.memmap.
+    """
+    def __init__(self, bloco=1024, limite_memoria=None, diretorio=None):
+        self.bloco = bloco
+        self.limite_memoria = limite_memoria
+        self.diretorio = diretorio
+        self._blocos = []  # blocos cheios ainda em memória
+        self._atual = np.empty(bloco, dtype=REGISTO)
+        self._n = 0  # registos ocupados em _atual
+        self._em_disco = 0  # registos já escritos no ficheiro
+        self._ficheiro = None
+        self._finalizador = None
+        self._cache = None
+
+    def __len__(self):
+        return self._em_disco + len(self._blocos) * self.bloco + self._n
+
+    def append(self, pos, passo=None):
+        if passo is None:
+            passo = self._ultimo_passo() + 1
+        if self._n == self.bloco:
+            self._fechar_bloco()
+        self._atual[self._n] = (pos[0], pos[1], passo)
+        self._n += 1
+        self._cache = None
+
+    def extend(self, posicoes, passos=None):
+        """Acrescenta várias posições de uma vez; sem 'passos', um passo por posição."""
+        posicoes = np.asarray(posicoes, dtype=np.int64).reshape(-1, 2)
+        if passos is None:
+            passos = self._ultimo_passo() + 1 + np.arange(len(posicoes))
+        passos = np.asarray(passos, dtype=np.int64)
+        i = 0
+        while i < len(posicoes):
+            if self._n == self.bloco:
+                self._fechar_bloco()
+            m = min(self.bloco - self._n, len(posicoes) - i)
+            destino = self._atual[self._n:self._n + m]
+            destino["x"] = posicoes[i:i + m, 0]
+            destino["y"] = posicoes[i:i + m, 1]
+            destino["passo"] = passos[i:i + m]
+            self._n += m
+            i += m
+        self._cache = None
+
+    def _ultimo_passo(self):
+        if self._n:
+            return int(self._atual[self._n - 1]["passo"])
+        if self._blocos:
+            return int(self._blocos[-1][-1]["passo"])
+        if len(self) == 0:
+            return -1
+        return int(self.registos()[-1]["passo"])
+
+    def _fechar_bloco(self):
+        self._blocos.append(self._atual)
+        self._atual = np.empty(self.bloco, dtype=REGISTO)
+        self._n = 0
+        if self.limite_memoria is not None and len(self._blocos) * self.bloco >= self.limite_memoria:
+            self._despejar()
+
+    def _despejar(self):
+        """Escreve os blocos cheios no fim do ficheiro da trajetória e liberta-os da memória."""
+        if self._ficheiro is None:
+            fd, self._ficheiro = tempfile.mkstemp(suffix=".traj", dir=self.diretorio)
+            os.close(fd)
+            self._finalizador = weakref.finalize(self, _remover_ficheiro, self._ficheiro)
+        with open(self._ficheiro, "ab") as f:
+            for bloco in self._blocos:
+                f.write(bloco.tobytes())
+        self._em_disco += len(self._blocos) * self.bloco
+        self._blocos = []
+
+    def registos(self):
+        """Todos os registos (x, y, passo) como um só array (a parte em disco via np.memmap)."""
+        if self._cache is None:
+            partes = []
+            if self._em_disco:
+                partes.append(np.memmap(self._ficheiro, dtype=REGISTO, mode="r", shape=(self._em_disco,)))
+            partes.extend(self._blocos)
+            partes.append(self._atual[:self._n])
+            self._cache = np.concatenate(partes) if len(partes) > 1 else partes[0].copy()
+        return self._cache
+
+    def posicoes(self):
+        """Array (n, 2) com as posições."""
+        r = self.registos()
+        return np.stack([r["x"], r["y"]], axis=1).astype(np.int64)
+
+    def __getitem__(self, i):
+        r = self.registos()[i]
+        if isinstance(i, slice):
+            return [(int(x), int(y)) for x, y in zip(r["x"], r["y"])]
+        return (int(r["x"]), int(r["y"]))
+
+    def __iter__(self):
+        r = self.registos()
+        return iter(zip(r["x"].tolist(), r["y"].tolist()))
+
+    def copia(self):
+        """Trajetória independente com os mesmos registos (para instantâneos do ambiente)."""
+        copia = Trajetoria(self.bloco, self.limite_memoria, self.diretorio)
+        r = self.registos()
+        if len(r):
+            copia.extend(np.stack([r["x"], r["y"]], axis=1), r["passo"])
+        return copia
+
+    def fechar(self):
+        """Apaga o ficheiro de despejo (se existir)."""
+        if self._finalizador is not None:
+            self._finalizador()
+
+
+class TrajetoriaContador:
+    """
+    Modo só contadores: guarda o comprimento do caminho e a última posição, sem o caminho.
+    len() dá o mesmo valor que a lista completa (é o que graficos.py usa como nº de passos).
+    """
+    def __init__(self):
+        self._comprimento = 0
+        self.ultima = None
+        self.ultimo_passo = -1
+
+    def __len__(self):
+        return self._comprimento
+
+    def append(self, pos, passo=None):
+        self._comprimento += 1
+        self.ultima = (pos[0], pos[1])
+        self.ultimo_passo = self.ultimo_passo + 1 if passo is None else passo
+
+    def extend(self, posicoes, passos=None):
+        n = len(posicoes)
+        if n == 0:
+            return
+        self._comprimento += n
+        self.ultima = tuple(int(v) for v in posicoes[-1])
+        self.ultimo_passo = self.ultimo_passo + n if passos is None else int(passos[-1])
+
+    def __getitem__(self, i):
+        if i == -1 and self.ultima is not None:
+            return self.ultima
+        raise IndexError("Trajetória em modo 'contadores': só a última posição está disponível")
+
+    def copia(self):
+        copia = TrajetoriaContador()
+        copia._comprimento, copia.ultima, copia.ultimo_passo = self._comprimento, self.ultima, self.ultimo_passo
+        return copia
+
+    def fechar(self):
+        pass
+
+
+class GravadorTrajetorias:
+    """
+    Cria as trajetórias dos agentes de um ambiente (AmbienteBase.historico_paths).
+    modo="completo" guarda todas as posições; modo="contadores" só o comprimento.
+    limite_memoria (em registos por agente) ativa o despejo para ficheiros em 'diretorio'.
+    """
+    MODOS = ("completo", "contadores")
+
+    def __init__(self, modo="completo", bloco=1024, limite_memoria=None, diretorio=None):
+        if modo not in self.MODOS:
+            raise ValueError(f"Modo de gravação desconhecido: {modo}")
+        self.modo = modo
+        self.bloco = bloco
+        self.limite_memoria = limite_memoria
+        self.diretorio = diretorio
+
+    def nova(self, pos_inicial, passo=0):
+        if self.modo == "contadores":
+            trajetoria = TrajetoriaContador()
+        else:
+            trajetoria = Trajetoria(self.bloco, self.limite_memoria, self.diretorio)
+        trajetoria.append(pos_inicial, passo)
+        return trajetoria
+
+
+def guardar_gravacao(ficheiro, ambiente, agentes=None):
+    """
+    Guarda num .npz o necessário para rever a simulação sem voltar a correr as políticas:
+    dimensões, farol, obstáculos e a trajetória (com os passos) de cada agente.
+    """
+    agentes = list(ambiente.historico_paths) if agentes is None else list(agentes)
+    dados = {
+        "largura": np.int64(ambiente.largura),
+        "altura": np.int64(ambiente.altura),
+        "farol": np.array(ambiente.farol if ambiente.farol else (-1, -1), dtype=np.int64),
+        "obstaculos": np.array([(o.dx, o.dy) for o in ambiente.obstaculos], dtype=np.int64).reshape(-1, 2),
+        "passos": np.int64(ambiente.passo_atual),
+        "ids": np.array([str(agente.id) for agente in agentes]),
+    }
+    for i, agente in enumerate(agentes):
+        trajetoria = ambiente.historico_paths[agente]
+        if not isinstance(trajetoria, Trajetoria):
+            raise ValueError("Só é possível guardar trajetórias gravadas em modo 'completo'")
+        dados[f"agente_{i}"] = trajetoria.registos()
+    np.savez_compressed(ficheiro, **dados)
+
+
+class Gravacao:
+    """Simulação gravada (ver guardar_gravacao), pronta a ser revista no Visualizador."""
+    def __init__(self, ficheiro):
+        with np.load(ficheiro) as dados:
+            self.largura = int(dados["largura"])
+            self.altura = int(dados["altura"])
+            farol = tuple(int(v) for v in dados["farol"])
+            self.farol = None if farol == (-1, -1) else farol
+            self.obstaculos = [(int(x), int(y)) for x, y in dados["obstaculos"]]
+            self.num_passos = int(dados["passos"])
+            self.ids = dados["ids"].tolist()
+            self.registos = [dados[f"agente_{i}"] for i in range(len(self.ids))]
+
+    def estado_no_passo(self, passo) -> dict:
+        """Mesmo formato que AmbienteBase.get_estado_visualizacao, no fim do passo dado."""
+        agentes = []
+        for r in self.registos:
+            i = max(int(np.searchsorted(r["passo"], passo, side="right")) - 1, 0)
+            agentes.append((int(r[i]["x"]), int(r[i]["y"])))
+        return {
+            "largura": self.largura,
+            "altura": self.altura,
+            "farol": self.farol,
+            "agentes": agentes,
+            "obstaculos": self.obstaculos,
+            "versao_obstaculos": 0
+        }
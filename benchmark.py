@@ -0,0 +1,318 @@
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import neat
+
+from agentes.Agente import AgenteBase
+from agentes.Politicas import PoliticaAleatoria, PoliticaFixa
+from agentes.Sensor import Sensor
+from agentes import RegistoModelos
+from ambiente.AmbienteFarol import AmbienteFarol
+from ambiente.AmbienteMaze import AmbienteMaze
+from ambiente.GeradorMazes import gerar_maze
+from simulador.MotorDeSimulacao import MotorDeSimulacao
+from simulador.NoveltyArchive import NoveltyArchive
+import treino_neat
+import treino_qlearning
+
+# Configurações
+SEMENTE = 1234
+MAX_PASSOS = 100
+REPETICOES = 3  # Episódios por cenário (o tempo comparado é o melhor)
+AMBIENTES = {"FAROL": range(1, 6), "MAZE": range(1, 5)}
+POLITICAS = ["PoliticaAleatoria", "PoliticaFixa", "PoliticaQLearning", "PoliticaRedeNeuronal"]
+NUM_AGENTES = [1, 10, 100, 1000]
+# Labirintos gerados (com SEMENTE) para medir a escala; não há modelos treinados para eles
+MAZES_GERADOS = {
+    "GERADO101": {"largura": 101, "altura": 101, "lacos": 0.05, "becos": 2, "salas": 4},
+    "GERADO501": {"largura": 501, "altura": 501, "lacos": 0.05, "becos": 2, "salas": 20},
+}
+POLITICAS_SEM_MODELO = ["PoliticaAleatoria", "PoliticaFixa"]
+EPISODIOS_QLEARNING = 100
+# Cenário da medição do coletor de lixo (com o maior nº de agentes pedido)
+AMBIENTE_GC = ("FAROL", 2)
+TOLERANCIA = 0.20  # Abrandamento relativo à baseline a partir do qual o cenário é assinalado
+DIFERENCA_MINIMA = 0.01  # Segundos; diferenças menores são ruído de medição
+# Módulos do núcleo da simulação e tempo máximo (s) para os importar num processo novo,
+# sem arrastar as dependências pesadas (só usadas na visualização, no NEAT e nos gráficos)
+MODULOS_NUCLEO = ["simulador.MotorDeSimulacao", "ambiente.AmbienteFarol", "ambiente.AmbienteMaze", "agentes.Politicas"]
+MODULOS_PESADOS = ["tkinter", "neat", "matplotlib"]
+ORCAMENTO_IMPORTACAO = 0.25
+FICHEIRO_RESULTADOS = "benchmark_resultados.json"
+FICHEIRO_BASELINE = "benchmark_baseline.json"
+CONFIG_NEAT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config-feedforward.txt")
+
+
+_ficheiros_gerados = {}  # nome em MAZES_GERADOS -> ficheiro .txt (preenchido por gerar_mazes)
+
+def criar_ambiente(ambiente, dificuldade):
+    if ambiente == "FAROL":
+        return AmbienteFarol(largura=15, altura=10, dificuldade=dificuldade)
+    if ambiente in _ficheiros_gerados:
+        return AmbienteMaze(ficheiro=_ficheiros_gerados[ambiente])
+    return AmbienteMaze(dificuldade=dificuldade)
+
+
+def gerar_mazes(diretorio):
+    """Gera os MAZES_GERADOS no diretório (sempre iguais para a mesma SEMENTE)."""
+    for nome, parametros in MAZES_GERADOS.items():
+        caminho = os.path.join(diretorio, f"{nome}.txt")
+        gerar_maze(caminho, semente=SEMENTE, **parametros)
+        _ficheiros_gerados[nome] = caminho
+
+
+def carregar_modelos(ambiente, dificuldade):
+    """Ficheiros de 'vencedores' usados pelo cenário (os mesmos que graficos.py), já carregados no registo."""
+    nome = "FAROL" if ambiente == "FAROL" else f"MAZE{dificuldade}"
+    modelos = (f"vencedores/vencedor_{nome}QL.pkl", f"vencedores/vencedor_{nome}.pkl")
+    RegistoModelos.carregar_tabela_q(modelos[0])
+    RegistoModelos.carregar_rede(modelos[1], CONFIG_NEAT)
+    return modelos
+
+
+def criar_politica(tipo, modelos, ambiente, agente):
+    caminho_q, caminho_n = modelos
+    if tipo == "PoliticaAleatoria":
+        return PoliticaAleatoria()
+    if tipo == "PoliticaFixa":
+        return PoliticaFixa()
+    if tipo == "PoliticaQLearning":
+        return RegistoModelos.politica_qlearning(caminho_q)
+    return RegistoModelos.politica_rede(caminho_n, ambiente, agente, CONFIG_NEAT)
+
+
+def preparar_simulacao(ambiente, dificuldade, tipo_politica, num_agentes, modelos):
+    random.seed(SEMENTE)
+    np.random.seed(SEMENTE)
+    sim = MotorDeSimulacao()
+    sim.ambiente = criar_ambiente(ambiente, dificuldade)
+    for i in range(num_agentes):
+        agente = AgenteBase(id=i)
+        agente.politica = criar_politica(tipo_politica, modelos, sim.ambiente, agente)
+        for direcao in [[0, -1], [0, 1], [-1, 0], [1, 0]]:
+            agente.instala(Sensor(direcao=direcao, movimentos=1))
+        sim.adicionar_agente_programatico(agente, pos_inicial=(1, 1))
+    sim.ambiente.adicionar_obstaculos(dificuldade)
+    return sim
+
+
+def medir_executa(ambiente, dificuldade, tipo_politica, num_agentes, modelos):
+    """Um episódio de MotorDeSimulacao.executa sem visualização; devolve (segundos, passos)."""
+    sim = preparar_simulacao(ambiente, dificuldade, tipo_politica, num_agentes, modelos)
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        sim.executa(MAX_PASSOS, visualizar=False)
+    return time.perf_counter() - inicio, sim.ambiente.passo_atual
+
+
+def medir_gc(ambiente, dificuldade, tipo_politica, num_agentes, modelos):
+    """
+    Um episódio como o de medir_executa, a contar as recolhas do coletor de lixo por geração e o
+    tempo em pausa. O CPython não tem contador de alocações, por isso os objetos por
+    agente-passo são estimados pelas recolhas da geração 0 (uma a cada gc.get_threshold()[0]
+    objetos criados e ainda vivos): mede o que o ciclo da simulação deixa para trás.
+    """
+    recolhas, pausa, inicio_pausa = [0, 0, 0], [0.0, 0.0], [0.0]
+
+    def registar(fase, info):
+        if fase == "start":
+            inicio_pausa[0] = time.perf_counter()
+        else:
+            duracao = time.perf_counter() - inicio_pausa[0]
+            recolhas[info["generation"]] += 1
+            pausa[0] += duracao
+            pausa[1] = max(pausa[1], duracao)
+
+    sim = preparar_simulacao(ambiente, dificuldade, tipo_politica, num_agentes, modelos)
+    gc.collect()
+    gc.callbacks.append(registar)
+    try:
+        inicio = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            sim.executa(MAX_PASSOS, visualizar=False)
+        segundos = time.perf_counter() - inicio
+    finally:
+        gc.callbacks.remove(registar)
+    passos = sim.ambiente.passo_atual
+    agente_passos = max(passos * num_agentes, 1)
+    return {
+        "segundos": pausa[0],
+        "segundos_episodio": segundos,
+        "pausa_maxima": pausa[1],
+        "recolhas": {f"geracao{g}": n for g, n in enumerate(recolhas)},
+        "objetos_por_agente_passo": recolhas[0] * gc.get_threshold()[0] / agente_passos,
+        "passos": passos,
+        "agentes": num_agentes,
+    }
+
+
+def resultado(tempos, passos, num_agentes):
+    melhor = min(tempos)
+    return {
+        "segundos": melhor,
+        "segundos_medio": sum(tempos) / len(tempos),
+        "passos": passos,
+        "agentes": num_agentes,
+        "passos_por_segundo": passos / melhor if melhor > 0 else None,
+        "agente_passos_por_segundo": passos * num_agentes / melhor if melhor > 0 else None,
+    }
+
+
+def medir_eval_genomes(config, repeticoes):
+    """Uma geração completa de treino_neat.eval_genomes (população da config, semente fixa)."""
+    tempos = []
+    for _ in range(repeticoes):
+        random.seed(SEMENTE)
+        populacao = neat.Population(config)
+        genomes = list(populacao.population.items())
+        treino_neat.arquivo_novelty = NoveltyArchive(threshold=5.0, decay_rate=0.02)
+        inicio = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            treino_neat.eval_genomes(genomes, config)
+        tempos.append(time.perf_counter() - inicio)
+    return {"segundos": min(tempos), "segundos_medio": sum(tempos) / len(tempos), "genomas": len(genomes)}
+
+
+def medir_treino_qlearning(episodios, repeticoes):
+    """Os episódios de run_training (treino_qlearning.treinar), sem o gráfico nem a gravação do modelo."""
+    tempos = []
+    for _ in range(repeticoes):
+        random.seed(SEMENTE)
+        inicio = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            treino_qlearning.treinar(episodios)
+        tempos.append(time.perf_counter() - inicio)
+    melhor = min(tempos)
+    return {"segundos": melhor, "segundos_medio": sum(tempos) / len(tempos), "episodios": episodios,
+            "segundos_por_episodio": melhor / episodios}
+
+
+def medir_importacao(repeticoes):
+    """Tempo de importação dos módulos do núcleo num interpretador novo (o arranque de um trabalhador)."""
+    codigo = ("import json, sys, time\n"
+              "inicio = time.perf_counter()\n"
+              + "".join(f"import {m}\n" for m in MODULOS_NUCLEO) +
+              "segundos = time.perf_counter() - inicio\n"
+              f"print(json.dumps([segundos, [m for m in {MODULOS_PESADOS!r} if m in sys.modules]]))")
+    tempos, pesados = [], []
+    for _ in range(max(repeticoes, 3)):
+        saida = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True, check=True,
+                               cwd=os.path.dirname(os.path.abspath(__file__)))
+        segundos, pesados = json.loads(saida.stdout)
+        tempos.append(segundos)
+    return {"segundos": min(tempos), "segundos_medio": sum(tempos) / len(tempos),
+            "orcamento": ORCAMENTO_IMPORTACAO, "modulos_pesados": pesados}
+
+
+def verificar_importacao(resultado_importacao):
+    """Problemas do arranque: orçamento de tempo excedido ou dependências pesadas importadas."""
+    problemas = []
+    if resultado_importacao["segundos"] > resultado_importacao["orcamento"]:
+        problemas.append(f"importação do núcleo demora {resultado_importacao['segundos']:.3f}s "
+                         f"(orçamento {resultado_importacao['orcamento']:.3f}s)")
+    if resultado_importacao["modulos_pesados"]:
+        problemas.append(f"o núcleo importa {', '.join(resultado_importacao['modulos_pesados'])}")
+    return problemas
+
+
+def medir_cenarios(cenarios, ambiente, dificuldade, politicas, num_agentes, repeticoes, modelos):
+    for tipo_politica in politicas:
+        for n in num_agentes:
+            tempos, passos = [], 0
+            for _ in range(repeticoes):
+                segundos, passos = medir_executa(ambiente, dificuldade, tipo_politica, n, modelos)
+                tempos.append(segundos)
+            chave = f"executa/{ambiente}{dificuldade}/{tipo_politica}/{n}"
+            cenarios[chave] = resultado(tempos, passos, n)
+            r = cenarios[chave]
+            print(f"{chave:45s} {r['segundos']:8.4f}s  {r['agente_passos_por_segundo'] or 0:12.0f} agente-passos/s")
+
+
+def correr(num_agentes=NUM_AGENTES, repeticoes=REPETICOES):
+    config = RegistoModelos.carregar_config(CONFIG_NEAT)
+    cenarios = {}
+    cenarios["importacao"] = medir_importacao(repeticoes)
+    print(f"{'importacao':45s} {cenarios['importacao']['segundos']:8.4f}s")
+    for ambiente, dificuldades in AMBIENTES.items():
+        for dificuldade in dificuldades:
+            modelos = carregar_modelos(ambiente, dificuldade)
+            medir_cenarios(cenarios, ambiente, dificuldade, POLITICAS, num_agentes, repeticoes, modelos)
+    ambiente, dificuldade = AMBIENTE_GC
+    modelos = carregar_modelos(ambiente, dificuldade)
+    for tipo_politica in POLITICAS:
+        chave = f"gc/{ambiente}{dificuldade}/{tipo_politica}/{max(num_agentes)}"
+        cenarios[chave] = r = medir_gc(ambiente, dificuldade, tipo_politica, max(num_agentes), modelos)
+        print(f"{chave:45s} {r['segundos']:8.4f}s  {r['recolhas']['geracao0']:5d} recolhas gen0  "
+              f"{r['objetos_por_agente_passo']:6.2f} objetos/agente-passo")
+    with tempfile.TemporaryDirectory() as diretorio:
+        gerar_mazes(diretorio)
+        for nome in MAZES_GERADOS:
+            medir_cenarios(cenarios, nome, "", POLITICAS_SEM_MODELO, num_agentes, repeticoes, (None, None))
+        _ficheiros_gerados.clear()
+
+    cenarios["eval_genomes"] = medir_eval_genomes(config, repeticoes)
+    print(f"{'eval_genomes':45s} {cenarios['eval_genomes']['segundos']:8.4f}s")
+    cenarios["run_training"] = medir_treino_qlearning(EPISODIOS_QLEARNING, repeticoes)
+    print(f"{'run_training':45s} {cenarios['run_training']['segundos']:8.4f}s")
+
+    return {
+        "maquina": {"python": platform.python_version(), "numpy": np.__version__,
+                    "plataforma": platform.platform(), "processador": platform.processor()},
+        "parametros": {"semente": SEMENTE, "max_passos": MAX_PASSOS, "repeticoes": repeticoes},
+        "cenarios": cenarios,
+    }
+
+
+def comparar(resultados, baseline, tolerancia=TOLERANCIA):
+    """Devolve [(cenário, segundos na baseline, segundos agora)] dos cenários que abrandaram."""
+    abrandamentos = []
+    for chave, atual in resultados["cenarios"].items():
+        antes = baseline.get("cenarios", {}).get(chave)
+        if not antes or antes["segundos"] <= 0 or atual["segundos"] - antes["segundos"] < DIFERENCA_MINIMA:
+            continue
+        if atual["segundos"] > antes["segundos"] * (1.0 + tolerancia):
+            abrandamentos.append((chave, antes["segundos"], atual["segundos"]))
+    return abrandamentos
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark do simulador (executa, eval_genomes, treino Q-Learning)")
+    parser.add_argument("--rapido", action="store_true", help="só até 100 agentes e 1 repetição")
+    parser.add_argument("--guardar-baseline", action="store_true", help=f"grava os resultados em {FICHEIRO_BASELINE}")
+    args = parser.parse_args()
+
+    if args.rapido:
+        resultados = correr([n for n in NUM_AGENTES if n <= 100], repeticoes=1)
+    else:
+        resultados = correr()
+    with open(FICHEIRO_RESULTADOS, "w") as f:
+        json.dump(resultados, f, indent=2)
+    print(f"Resultados gravados em {FICHEIRO_RESULTADOS}")
+
+    if args.guardar_baseline:
+        with open(FICHEIRO_BASELINE, "w") as f:
+            json.dump(resultados, f, indent=2)
+        print(f"Baseline gravada em {FICHEIRO_BASELINE}")
+    problemas = verificar_importacao(resultados["cenarios"]["importacao"])
+    for problema in problemas:
+        print(f"ARRANQUE {problema}")
+    if not args.guardar_baseline and os.path.exists(FICHEIRO_BASELINE):
+        with open(FICHEIRO_BASELINE) as f:
+            abrandamentos = comparar(resultados, json.load(f))
+        for chave, antes, agora in abrandamentos:
+            print(f"ABRANDOU {chave}: {antes:.4f}s -> {agora:.4f}s ({agora / antes:.2f}x)")
+        if not abrandamentos:
+            print(f"Sem abrandamentos acima de {TOLERANCIA:.0%} em relação à baseline.")
+        problemas += abrandamentos
+    if problemas:
+        raise SystemExit(1)
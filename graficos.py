@@ -1,175 +1,243 @@
 # Em main.py - VERSÃO COM GRÁFICOS DE BARRAS
-import pickle
+import argparse
+import json
+import multiprocessing
+import random
+import zlib
 from agentes.Agente import AgenteBase
-from agentes.Politicas import PoliticaFixa, PoliticaQLearning, PoliticaRedeNeuronal
+from agentes.Politicas import PoliticaFixa
 from agentes.Sensor import Sensor
+from agentes import RegistoModelos
 from ambiente.AmbienteFarol import AmbienteFarol
 from ambiente.AmbienteMaze import AmbienteMaze
+from ambiente.Trajetorias import GravadorTrajetorias
 from simulador.MotorDeSimulacao import MotorDeSimulacao
 from collections import defaultdict
-import matplotlib.pyplot as plt
 import os
 import numpy as np
-import neat 
 
 # Configurações globais
 NUM_SIMULACOES = 30
 NUM_EPISODIOS = 3
 MAX_PASSOS = 100
+PROCESSOS = os.cpu_count() or 1
+FICHEIRO_RESULTADOS = os.path.join("graficos", "resultados.jsonl")
 cores = ["blue", "red", "green", "orange", "purple", "pink"]
 
-if __name__ == "__main__":
-
-    ambientes = {
-        "FAROL": {"dificuldades": range(1, 6), "num_sim": NUM_SIMULACOES},
-        "MAZE": {"dificuldades": range(1, 5), "num_sim": 1}
-    }
-
+AMBIENTES = {
+    "FAROL": {"dificuldades": range(1, 6), "num_sim": NUM_SIMULACOES},
+    "MAZE": {"dificuldades": range(1, 5), "num_sim": 1}
+}
+
+def carregar_modelo(carregar, caminho):
+    """Modelo de 'vencedores' através do registo (lido uma vez por processo). None se não existir."""
+    try:
+        return carregar(caminho)
+    except FileNotFoundError:
+        print(f"Aviso: Arquivo não encontrado: {caminho}")
+        return None
+
+
+def celulas():
+    """Todas as combinações (ambiente, dificuldade, simulação) da experiência."""
+    return [(ambiente, dificuldade, sim_num)
+            for ambiente, info in AMBIENTES.items()
+            for dificuldade in info["dificuldades"]
+            for sim_num in range(info["num_sim"])]
+
+
+def correr_celula(celula):
+    """
+    Uma simulação (NUM_EPISODIOS episódios seguidos no mesmo motor, como antes).
+    Devolve a linha de resultados: {ambiente, dificuldade, sim, passos: {política: [passos por episódio]}}.
+    """
+    ambiente, dificuldade, sim_num = celula
+    # Semente própria de cada célula: resultados reprodutíveis e independentes do processo que a corre
+    random.seed(zlib.crc32(f"{ambiente}/{dificuldade}/{sim_num}".encode()))
+    print(f"Simulação {sim_num+1} - Ambiente {ambiente} Dificuldade {dificuldade}.")
+
+    # Criar ambiente
+    sim = MotorDeSimulacao()
+    if ambiente == "FAROL":
+        sim.ambiente = AmbienteFarol(largura=15, altura=10, dificuldade=dificuldade)
+    else:
+        sim.ambiente = AmbienteMaze(dificuldade=dificuldade)
+    sim.agentes = []
+    # Só é preciso o nº de passos de cada agente: não guarda os caminhos
+    sim.ambiente.gravador = GravadorTrajetorias(modo="contadores")
+
+    # Criar agentes
+    lista_agentes = []
+
+    # Política fixa
+    agente_fixa = AgenteBase(id="fixa")
+    agente_fixa.politica = PoliticaFixa()
+    lista_agentes.append(agente_fixa)
+
+    # QLearning
+    if ambiente == "FAROL":
+        caminho_q = f"vencedores/vencedor_FAROLQL.pkl"
+    else:
+        caminho_q = f"vencedores/vencedor_MAZE{dificuldade}QL.pkl"
+    if carregar_modelo(RegistoModelos.carregar_tabela_q, caminho_q) is not None:
+        agente_q = AgenteBase(id=f"qlearning{dificuldade}")
+        agente_q.politica = RegistoModelos.politica_qlearning(caminho_q)
+        lista_agentes.append(agente_q)
+
+    # Aprendizagem (NEAT)
+    if ambiente == "FAROL":
+        caminho_n = f"vencedores/vencedor_FAROL.pkl"
+    else:
+        caminho_n = f"vencedores/vencedor_MAZE{dificuldade}.pkl"
+    if carregar_modelo(RegistoModelos.carregar_rede, caminho_n) is not None:
+        agente_n = AgenteBase(id=f"aprendizagem{dificuldade}")
+        agente_n.politica = RegistoModelos.politica_rede(caminho_n, sim.ambiente, agente_n)
+        lista_agentes.append(agente_n)
+
+    # Adicionar agentes ao ambiente
+    for agente in lista_agentes:
+        direcoes_sensores = [ [0, -1], [0, 1], [-1, 0], [1, 0] ]
+        for dir in direcoes_sensores:
+            sensor = Sensor(direcao=dir, movimentos=1)
+            agente.instala(sensor)
+
+        sim.agentes.append(agente)
+        # Posição inicial pode precisar de ajuste
+        sim.ambiente.adicionar_agente(agente, (1, 1))
+
+    passos_por_episodio = defaultdict(list)
+
+    # Executar episódios
+    for episodio in range(NUM_EPISODIOS):
+        # Verifique o nome exato do parâmetro
+        if ambiente=="MAZE" and dificuldade==3:
+            sim.executa(MAX_PASSOS, visualizar=True)
+        else:
+            sim.executa(MAX_PASSOS, visualizar=False)
+        for agente in sim.listaAgentes():
+            politica_nome = type(agente.politica).__name__
+            passos = len(sim.ambiente.historico_paths[agente])
+            passos_por_episodio[politica_nome].append(passos)
+
+    return {"ambiente": ambiente, "dificuldade": dificuldade, "sim": sim_num, "passos": dict(passos_por_episodio)}
+
+
+def ler_resultados(ficheiro=FICHEIRO_RESULTADOS):
+    """Linhas já gravadas. Uma última linha incompleta (corrida interrompida) é ignorada."""
+    linhas = []
+    if not os.path.exists(ficheiro):
+        return linhas
+    with open(ficheiro) as f:
+        for linha in f:
+            try:
+                linhas.append(json.loads(linha))
+            except json.JSONDecodeError:
+                continue
+    return linhas
+
+
+def correr_experiencia(ficheiro=FICHEIRO_RESULTADOS, processos=PROCESSOS):
+    """
+    Corre as células que ainda não estão no ficheiro, num pool de processos, e grava
+    cada linha assim que termina. Se for interrompida, volta a correr só o que falta.
+    """
+    feitas = {(r["ambiente"], r["dificuldade"], r["sim"]) for r in ler_resultados(ficheiro)}
+    pendentes = [c for c in celulas() if c not in feitas]
+    print(f"{len(feitas)} simulações já feitas, {len(pendentes)} por fazer.")
+    if not pendentes:
+        return
+
+    os.makedirs(os.path.dirname(ficheiro) or ".", exist_ok=True)
+    # Termina uma linha deixada a meio por uma interrupção (é ignorada ao ler)
+    if os.path.exists(ficheiro) and os.path.getsize(ficheiro) > 0:
+        with open(ficheiro, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            incompleta = f.read(1) != b"\n"
+        if incompleta:
+            with open(ficheiro, "a") as f:
+                f.write("\n")
+    with open(ficheiro, "a") as f:
+        if processos > 1:
+            with multiprocessing.Pool(processos) as pool:
+                for linha in pool.imap_unordered(correr_celula, pendentes):
+                    f.write(json.dumps(linha) + "\n")
+                    f.flush()
+        else:
+            for celula in pendentes:
+                f.write(json.dumps(correr_celula(celula)) + "\n")
+                f.flush()
+
+
+def agrupar_resultados(linhas):
+    """resultados[ambiente+dificuldade][política] = [[passos por episódio] por simulação], por ordem de simulação."""
     resultados = defaultdict(lambda: defaultdict(list))
+    ordem = {c: i for i, c in enumerate(celulas())}
+    linhas = sorted(linhas, key=lambda r: ordem.get((r["ambiente"], r["dificuldade"], r["sim"]), len(ordem)))
+    for r in linhas:
+        for politica, passos in r["passos"].items():
+            resultados[f"{r['ambiente']}{r['dificuldade']}"][politica].append(passos)
+    return resultados
 
-    for ambiente, info in ambientes.items():
-        for dificuldade in info["dificuldades"]:
-            for sim_num in range(info["num_sim"]):
-                print(f"Simulação {sim_num+1} - Ambiente {ambiente} Dificuldade {dificuldade}.")
-
-                # Criar ambiente
-                if ambiente == "FAROL":
-                    sim = MotorDeSimulacao()
-                    sim.ambiente = AmbienteFarol(largura=15, altura=10, dificuldade=dificuldade)
-                else:
-                    sim = MotorDeSimulacao()
-                    sim.ambiente = AmbienteMaze(dificuldade=dificuldade)
-
-                sim.agentes = []
-                
-                # Criar agentes
-                lista_agentes = [] 
-
-                # Política fixa
-                agente_fixa = AgenteBase(id="fixa")
-                agente_fixa.politica = PoliticaFixa()
-                lista_agentes.append(agente_fixa)
-
-                # QLearning
-                try:
-                    if ambiente == "FAROL":
-                        caminho_q = f"vencedores/vencedor_FAROLQL.pkl"
-                    else:
-                        caminho_q = f"vencedores/vencedor_MAZE{dificuldade}QL.pkl"
-                    
-                    with open(caminho_q, "rb") as f:
-                        dados = pickle.load(f)
-                        q_table = dados.get("Q")
-                    
-                    agente_q = AgenteBase(id=f"qlearning{dificuldade}")
-                    agente_q.politica = PoliticaQLearning(epsilon=0.0, q_table=q_table)
-                    agente_q.politica.treinando = False
-                    lista_agentes.append(agente_q)
-                except FileNotFoundError:
-                    print(f"Aviso: Arquivo Q-table não encontrado: {caminho_q}")
-
-                # Aprendizagem (NEAT)
-                try:
-                    if ambiente == "FAROL":
-                        caminho_n = f"vencedores/vencedor_FAROL.pkl"
-                    else:
-                        caminho_n = f"vencedores/vencedor_MAZE{dificuldade}.pkl"
-            
-                    with open(caminho_n, "rb") as f:
-                        vencedor = pickle.load(f)
-
-                   
-
-                     # Carregar configuração NEAT
-                    
-                    local_dir = os.path.dirname(__file__)
-                    config_path = os.path.join(local_dir, "config-feedforward.txt")
-                    config = neat.Config(neat.DefaultGenome, neat.DefaultReproduction,
-                                        neat.DefaultSpeciesSet, neat.DefaultStagnation,
-                                        config_path)
-                    net = neat.nn.FeedForwardNetwork.create(vencedor, config)
-                    agente_n = AgenteBase(id=f"aprendizagem{dificuldade}")
-                    agente_n.politica = PoliticaRedeNeuronal(net, sim.ambiente, agente_n)
-                    lista_agentes.append(agente_n)
-                  
-                except FileNotFoundError:
-                    print(f"Aviso: Arquivo NEAT não encontrado: {caminho_n}")
-
-                # Adicionar agentes ao ambiente
-                for agente in lista_agentes:
-                    direcoes_sensores = [ [0, -1], [0, 1], [-1, 0], [1, 0] ]
-                    for dir in direcoes_sensores:
-                        sensor = Sensor(direcao=dir, movimentos=1)
-                        agente.instala(sensor)
-                    
-                    sim.agentes.append(agente)
-                    # Posição inicial pode precisar de ajuste
-                    sim.ambiente.adicionar_agente(agente, (1, 1))
-
-                passos_por_episodio = defaultdict(list)
-
-                # Executar episódios
-                for episodio in range(NUM_EPISODIOS):
-                    # Verifique o nome exato do parâmetro
-                    if ambiente=="MAZE" and dificuldade==3:
-                        sim.executa(MAX_PASSOS, visualizar=True)
-                    else:
-                        sim.executa(MAX_PASSOS, visualizar=False)
-                    for agente in sim.listaAgentes():
-                        politica_nome = type(agente.politica).__name__   
-                        passos = len(sim.ambiente.historico_paths[agente])
-                        passos_por_episodio[politica_nome].append(passos)
-                    
-
-                # Guardar resultados
-                for politica, passos in passos_por_episodio.items():
-                    resultados[f"{ambiente}{dificuldade}"][politica].append(passos)
 
+def desenhar_graficos(resultados):
     # === GRÁFICOS DE BARRAS ===
+    # matplotlib só é importado aqui: os processos do pool não precisam dele
+    import matplotlib.pyplot as plt
     for ambiente_dif, politicas in resultados.items():
-        if not politicas: 
+        if not politicas:
             print(f"Não há dados para {ambiente_dif}")
             continue
-        
+
         plt.figure(figsize=(12, 6))
-        
+
         # Calcular médias para cada política
         nomes_politicas = []
         medias_passos = []
         erros_passos = []
-        
+
         for i, (politica, dados_simulacoes) in enumerate(politicas.items()):
             # dados_simulacoes é uma lista de listas: [[ep1_sim1, ep2_sim1, ...], [ep1_sim2, ...], ...
             # Achatar os dados: todos os episódios de todas as simulações
             todos_passos = []
             for sim_passos in dados_simulacoes:
-               
+
                 todos_passos.extend(sim_passos)
-            
+
             # Calcular média e desvio padrão
             media = np.mean(todos_passos)
             erro = np.std(todos_passos)
-            
+
             nomes_politicas.append(politica)
             medias_passos.append(media)
             erros_passos.append(erro)
-        
+
         # Criar barras
         barras = plt.bar(nomes_politicas, medias_passos, yerr=erros_passos,
                         capsize=3, error_kw={'elinewidth': 0.6,'ecolor': 'gray','capthick': 0.6},
-                        color=cores[:len(nomes_politicas)],alpha=0.7,edgecolor='black', linewidth=0.5)        
+                        color=cores[:len(nomes_politicas)],alpha=0.7,edgecolor='black', linewidth=0.5)
         # Adicionar valores nas barras
         for barra, valor in zip(barras, medias_passos):
             plt.text(barra.get_x() + barra.get_width()/2, barra.get_height() + 2,f'{valor:.1f}',ha='center',va='bottom',fontsize=10)
-        
+
         plt.xlabel('Política')
         plt.ylabel('Número Médio de Passos')
         plt.title(f'Comparação de Políticas - {ambiente_dif}')
-       
-        
-       
-        
+
+
+
+
         plt.show()
-        
 
-       
\ No newline at end of file
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Comparação de políticas (resultados em " + FICHEIRO_RESULTADOS + ")")
+    parser.add_argument("--so-graficos", action="store_true", help="não corre simulações, só desenha os gráficos")
+    parser.add_argument("--recomecar", action="store_true", help="apaga os resultados guardados e corre tudo de novo")
+    parser.add_argument("--processos", type=int, default=PROCESSOS)
+    args = parser.parse_args()
+
+    if args.recomecar and os.path.exists(FICHEIRO_RESULTADOS):
+        os.remove(FICHEIRO_RESULTADOS)
+    if not args.so_graficos:
+        correr_experiencia(FICHEIRO_RESULTADOS, args.processos)
+    desenhar_graficos(agrupar_resultados(ler_resultados(FICHEIRO_RESULTADOS)))
@@ -1,10 +1,16 @@
-
-
+import sys
 from simulador.MotorDeSimulacao import MotorDeSimulacao
 
 MAX_PASSOS = 100
 
 if __name__ == "__main__":
+    # Rever uma simulação gravada: python main.py gravacao.npz
+    if len(sys.argv) > 1:
+        from ambiente.Trajetorias import Gravacao
+        from simulador.Visualizador import Visualizador
+        Visualizador(30).reproduzir(Gravacao(sys.argv[1]))
+        sys.exit()
+
     # Teste inicial (comente se não for necessário)
     try:
         sim = MotorDeSimulacao.cria("parametros.json")
@@ -0,0 +1,93 @@
+import numpy as np
+
+class DetetorCiclos:
+    """
+    Deteta agentes determinísticos que entram num ciclo num ambiente estático.
+    O estado de um agente é (posição, última ação): se um estado se repete e todas as
+    decisões desde a primeira ocorrência foram determinísticas, o resto do episódio é
+    uma repetição do ciclo. Nesse caso a posição final, as colisões e o caminho
+    (historico_paths) são extrapolados sem simular os passos que faltam.
+    """
+    def __init__(self, ambiente, max_passos: int):
+        self.ambiente = ambiente
+        self.max_passos = max_passos
+        self.acelerados = set()
+        self._vistos = {}  # agente -> {estado: índice no registo}
+        self._registo = {}  # agente -> [(posição, última ação, colisões, comprimento do caminho)]
+        self.passos_executados = 0
+        self.passos_poupados = 0
+
+    def acelerar(self, agente) -> bool:
+        """
+        Chamado no início de cada passo, antes da observação.
+        Devolve True se o agente já foi extrapolado até ao fim e não precisa de ser simulado.
+        """
+        if agente in self.acelerados:
+            return True
+        self.passos_executados += 1
+        if agente.agente_no_farol:
+            return False
+        pos = self.ambiente.posicoes_agentes.get(agente)
+        if pos is None:
+            return False
+
+        ultima = self.ambiente.ultimas_acoes.get(agente)
+        estado = (pos, (ultima.dx, ultima.dy) if ultima is not None else None)
+        registo = self._registo.setdefault(agente, [])
+        vistos = self._vistos.setdefault(agente, {})
+        registo.append((pos, ultima, agente.colisoes, len(self.ambiente.historico_paths[agente])))
+
+        inicio = vistos.get(estado)
+        if inicio is None:
+            vistos[estado] = len(registo) - 1
+            return False
+
+        self.passos_executados -= 1
+        self._extrapolar(agente, registo, inicio)
+        self.acelerados.add(agente)
+        return True
+
+    def registar_decisao(self, agente, observacao):
+        """Uma decisão não determinística invalida os estados vistos até aqui."""
+        if agente.agente_no_farol or agente not in self._vistos:
+            return
+        if not agente.politica.determinista(observacao):
+            self._vistos[agente].clear()
+
+    def _extrapolar(self, agente, registo, inicio):
+        ambiente = self.ambiente
+        atual = len(registo) - 1
+        periodo = atual - inicio
+        restantes = self.max_passos - ambiente.passo_atual
+        voltas, resto = divmod(restantes, periodo)
+
+        # Cada passo do ciclo acrescenta ao caminho, no máximo, a posição onde o agente ficou
+        movimentos = [(j - inicio, registo[j + 1][0]) for j in range(inicio, atual) if registo[j + 1][3] > registo[j][3]]
+        desvios = np.array([m for m, _ in movimentos], dtype=np.int64)
+        posicoes = np.array([p for _, p in movimentos], dtype=np.int64).reshape(-1, 2)
+        parcial = desvios < resto
+        # O movimento m da volta v acontece no passo passo_atual + v * periodo + m + 1
+        passos = np.concatenate([(desvios + periodo * np.arange(voltas)[:, None]).ravel(),
+                                 desvios[parcial] + periodo * voltas]) + ambiente.passo_atual + 1
+        ambiente.historico_paths[agente].extend(np.concatenate([np.tile(posicoes, (voltas, 1)), posicoes[parcial]]), passos)
+
+        pos, ultima, colisoes, _ = registo[inicio + resto]
+        colisoes_ciclo = registo[atual][2] - registo[inicio][2]
+        agente.colisoes += voltas * colisoes_ciclo + (colisoes - registo[inicio][2])
+        ambiente.definir_posicao(agente, pos)
+        if ultima is not None:
+            ambiente.ultimas_acoes[agente] = ultima
+        self.passos_poupados += restantes
+
+    def todos_acelerados(self, agentes) -> bool:
+        """True se todos os agentes que ainda não chegaram ao objetivo foram extrapolados."""
+        return all(agente in self.acelerados or agente.agente_no_farol for agente in agentes)
+
+    def relatorio(self) -> dict:
+        total = self.passos_executados + self.passos_poupados
+        return {
+            "agentes_acelerados": len(self.acelerados),
+            "passos_executados": self.passos_executados,
+            "passos_poupados": self.passos_poupados,
+            "speedup": total / self.passos_executados if self.passos_executados else 1.0,
+        }
@@ -0,0 +1,86 @@
+import asyncio
+import json
+import threading
+
+class DeltaPasso:
+    """
+    O que mudou num passo da simulação (MotorDeSimulacao.passos):
+    - passo: nº de passos já executados (o estado descrito é o do fim deste passo);
+    - movimentos: (id, x, y) de cada agente que mudou de célula;
+    - colisoes: (id, nº de colisões neste passo);
+    - chegadas: ids dos agentes que chegaram ao farol.
+    """
+    __slots__ = ("passo", "movimentos", "colisoes", "chegadas")
+
+    def __init__(self, passo, movimentos, colisoes, chegadas):
+        self.passo = passo
+        self.movimentos = movimentos
+        self.colisoes = colisoes
+        self.chegadas = chegadas
+
+    def para_dict(self) -> dict:
+        return {"passo": self.passo, "movimentos": self.movimentos,
+                "colisoes": self.colisoes, "chegadas": self.chegadas}
+
+    def __repr__(self):
+        return (f"DeltaPasso(passo={self.passo}, movimentos={len(self.movimentos)}, "
+                f"colisoes={len(self.colisoes)}, chegadas={len(self.chegadas)})")
+
+
+async def passos_async(motor, max_passos, tamanho_fila=64, descartar=False, detetar_ciclos=False):
+    """
+    Versão assíncrona de MotorDeSimulacao.passos: a simulação corre numa thread e os deltas
+    passam por uma fila de 'tamanho_fila'. Com a fila cheia a simulação espera pelo consumidor
+    (descartar=False) ou continua e descarta o delta mais antigo da fila (descartar=True;
+    os passos em falta veem-se pelo 'passo' dos deltas). Parar de consumir termina a simulação.
+    """
+    loop = asyncio.get_running_loop()
+    fila = asyncio.Queue(tamanho_fila)
+    parar = threading.Event()
+    fim = object()
+
+    def por_ou_descartar(item):
+        if fila.full():
+            fila.get_nowait()
+        fila.put_nowait(item)
+
+    def enviar(item):
+        if descartar:
+            loop.call_soon_threadsafe(por_ou_descartar, item)
+        else:
+            asyncio.run_coroutine_threadsafe(fila.put(item), loop).result()
+
+    def produzir():
+        try:
+            for delta in motor.passos(max_passos, detetar_ciclos=detetar_ciclos):
+                if parar.is_set():
+                    break
+                enviar(delta)
+        finally:
+            if not parar.is_set():
+                enviar(fim)
+
+    produtor = loop.run_in_executor(None, produzir)
+    try:
+        while True:
+            delta = await fila.get()
+            if delta is fim:
+                break
+            yield delta
+    finally:
+        # Liberta o produtor se estiver à espera de lugar na fila
+        parar.set()
+        while not fila.empty():
+            fila.get_nowait()
+        await produtor
+
+
+async def transmitir(motor, max_passos, escritor, **opcoes):
+    """
+    Envia os deltas de passos_async como linhas JSON para um asyncio.StreamWriter (ex.: de
+    asyncio.open_connection ou de um servidor local). O drain() de cada linha passa a pressão
+    do consumidor para a fila e daí para a simulação.
+    """
+    async for delta in passos_async(motor, max_passos, **opcoes):
+        escritor.write((json.dumps(delta.para_dict()) + "\n").encode("utf-8"))
+        await escritor.drain()
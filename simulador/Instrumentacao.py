@@ -0,0 +1,63 @@
+import json
+import time
+
+class Estatisticas:
+    """
+    Tempos por fase do ciclo de simulação (e por tipo de política na decisão) e contadores.
+    Cada tempo entra num acumulado e num histograma de base 2 em microssegundos
+    (o balde i conta as medições com i bits, ou seja, em [2^(i-1), 2^i) µs).
+    Só existe quando a instrumentação é ligada (MotorDeSimulacao.estatisticas); desligada
+    o custo é um teste 'is None' por fase.
+    """
+    BALDES = 32
+
+    def __init__(self, ficheiro_jsonl=None):
+        self.tempos = {}  # fase -> [total em segundos, nº de medições, histograma]
+        self.contadores = {}
+        self.ficheiro_jsonl = ficheiro_jsonl
+
+    def registar(self, fase, segundos):
+        entrada = self.tempos.get(fase)
+        if entrada is None:
+            entrada = self.tempos[fase] = [0.0, 0, [0] * self.BALDES]
+        entrada[0] += segundos
+        entrada[1] += 1
+        entrada[2][min(int(segundos * 1e6).bit_length(), self.BALDES - 1)] += 1
+
+    def contar(self, nome, n=1):
+        self.contadores[nome] = self.contadores.get(nome, 0) + n
+
+    def resumo(self) -> dict:
+        fases = {}
+        for fase, (total, n, histograma) in self.tempos.items():
+            ultimo = max((i for i, c in enumerate(histograma) if c), default=-1)
+            fases[fase] = {
+                "total_s": total,
+                "medicoes": n,
+                "media_us": total / n * 1e6 if n else 0.0,
+                "histograma_us": histograma[:ultimo + 1],
+            }
+        return {"fases": fases, "contadores": dict(self.contadores)}
+
+    def emitir(self, **extra):
+        """
+        Acrescenta o resumo (mais os campos 'extra') como uma linha ao ficheiro JSONL.
+        Os valores são acumulados desde a criação (ou o último limpar()).
+        """
+        if self.ficheiro_jsonl is None:
+            return
+        registo = {"tempo": time.time(), **extra, **self.resumo()}
+        with open(self.ficheiro_jsonl, "a") as f:
+            f.write(json.dumps(registo) + "\n")
+
+    def limpar(self):
+        self.tempos = {}
+        self.contadores = {}
+
+    def __str__(self):
+        linhas = []
+        for fase, r in sorted(self.resumo()["fases"].items(), key=lambda item: -item[1]["total_s"]):
+            linhas.append(f"{fase:40s} {r['total_s']:9.4f}s  {r['medicoes']:9d}x  {r['media_us']:9.1f}µs")
+        for nome, valor in sorted(self.contadores.items()):
+            linhas.append(f"{nome:40s} {valor:9d}")
+        return "\n".join(linhas)
@@ -1,24 +1,36 @@
-import pickle
 from agentes.Accao import Accao
 from agentes.Sensor import Sensor
-from agentes.Politicas import PoliticaAleatoria, PoliticaFixa, PoliticaQLearning, PoliticaRedeNeuronal
+from agentes.Politicas import PoliticaAleatoria, PoliticaFixa
 from ambiente.AmbienteFarol import AmbienteFarol
 from ambiente.AmbienteBase import AmbienteBase
 from ambiente.AmbienteMaze import AmbienteMaze
 from agentes.Agente import AgenteBase
-from simulador.Visualizador import Visualizador 
+from agentes.EstadoAgentes import EstadoAgentes
+from simulador.DetetorCiclos import DetetorCiclos
+from ambiente.Trajetorias import GravadorTrajetorias, guardar_gravacao
+from simulador.Instrumentacao import Estatisticas
+from agentes import RegistoModelos
 import json
 import time
-import neat
 import os
+# tkinter (Visualizador) e neat (dentro do RegistoModelos) só são importados nos caminhos que os usam,
+# para que os processos sem visualização arranquem depressa e funcionem sem display
 
 class MotorDeSimulacao:
-    def __init__(self, ambiente: AmbienteBase=None, visualizador: Visualizador = None):
+    def __init__(self, ambiente: AmbienteBase=None, visualizador: "Visualizador" = None):
         """Novo construtor para ser usado pelo AG."""
         self.ambiente = ambiente
         self.agentes = []
+        # Estado dos agentes (colisões, chegada) em listas paralelas indexadas por AgenteBase.indice
+        self.estado_agentes = EstadoAgentes()
         self.visualizador = visualizador
+        # (tamanho_celula, fps) do Visualizador criado por cria(); a janela só abre quando executa visualiza
+        self.parametros_visualizacao = None
         self.terminado = False
+        self.relatorio_ciclos = None
+        self.ficheiro_gravacao = None
+        # simulador.Instrumentacao.Estatisticas para medir o tempo de cada fase de executa (None = desligado)
+        self.estatisticas = None
 
     def cria(nome_do_ficheiro_parametros: str):
         print(f"A carregar simulação... (ficheiro '{nome_do_ficheiro_parametros}')")
@@ -45,12 +57,32 @@ class MotorDeSimulacao:
         elif tipo_amb == 'maze':
             simulador.ambiente = AmbienteMaze(
                 dificuldade = params_ambiente.get('dificuldade', 2),
+                ficheiro = params_ambiente.get('ficheiro'),
             )
         else:
             raise ValueError(f"Tipo de ambiente desconhecido: {tipo_amb}")
         
         
         print(f"Ambiente '{tipo_amb}' criado com dificuldade {simulador.ambiente.dificuldade}.")
+        # Agentes que não se atravessam (opcional)
+        if params_ambiente.get('agentes_bloqueiam', False):
+            simulador.ambiente.ativar_ocupacao(bloquear=True)
+
+        # Gravação das trajetórias (opcional): modo, despejo para disco e ficheiro para rever depois
+        params_gravacao = params.get('gravacao', {})
+        if params_gravacao.get('ficheiro') and params_gravacao.get('modo', 'completo') != 'completo':
+            # Só as trajetórias completas podem ser gravadas (guardar_gravacao): falhar já, antes de simular
+            raise ValueError("A gravação em ficheiro precisa do modo 'completo' (o modo 'contadores' só guarda o nº de passos)")
+        simulador.ambiente.gravador = GravadorTrajetorias(
+            modo=params_gravacao.get('modo', 'completo'),
+            limite_memoria=params_gravacao.get('limite_memoria'),
+            diretorio=params_gravacao.get('diretorio'),
+        )
+        simulador.ficheiro_gravacao = params_gravacao.get('ficheiro')
+
+        # Instrumentação (opcional): tempos por fase, com um resumo por execução num ficheiro JSONL
+        if 'instrumentacao' in params:
+            simulador.estatisticas = Estatisticas(params['instrumentacao'].get('ficheiro'))
         # Inicializar Agentes
         for params_agente in params.get('agentes', []):
             id_agente = params_agente.get('id')
@@ -70,39 +102,20 @@ class MotorDeSimulacao:
             elif tipo_politica == 'aprendizagem':
                 ficheiro_politica = params_politica.get('ficheiro', 'vencedor.pkl')
                 caminho_completo = os.path.join("vencedores", ficheiro_politica)
-                 # Carregar configuração NEAT
-                local_dir = os.path.dirname(__file__)
-                config_path = os.path.join(local_dir,'..', 'config-feedforward.txt')
-                config = neat.Config(neat.DefaultGenome, neat.DefaultReproduction,
-                                    neat.DefaultSpeciesSet, neat.DefaultStagnation,
-                                    config_path)
-                with open(caminho_completo, 'rb') as f:
-                    vencedor = pickle.load(f)
-                net = neat.nn.FeedForwardNetwork.create(vencedor, config)
-                politica_obj = PoliticaRedeNeuronal(net,simulador.ambiente, agente)
+                # A configuração NEAT e a rede vêm do registo (lidas uma vez por processo)
+                politica_obj = RegistoModelos.politica_rede(caminho_completo, simulador.ambiente, agente)
             elif tipo_politica == 'qlearning':
                 ficheiro = params_politica.get('ficheiro', 'vencedor_QL.pkl')
                 caminho = os.path.join("vencedores", ficheiro)
-                # Valores padrão
-                q_table = None
-                epsilon = 0.0
                 
                 if not os.path.exists(caminho):
                     caminho = os.path.join("vencedores/vencedor_QL.pkl" )
 
                 print (f"A carregar modelo Q-Learning de '{caminho}'...") 
-                with open(caminho, 'rb') as f:
-                    dados = pickle.load(f)
-                    q_table = dados.get('Q')
-                    print(f"Modelo Q-Learning carregado: {len(q_table)} estados.")
-                
-                # Instancia a política passando a tabela carregada
-                politica_obj = PoliticaQLearning(
-                    epsilon=epsilon, 
-                    q_table=q_table
-                )
-                # Define como modo de teste (não aprende enquanto executa a simulação final)
-                politica_obj.treinando = False 
+                # Política em modo de teste (não aprende enquanto executa a simulação final),
+                # com a tabela partilhada por todos os agentes que usam o mesmo ficheiro
+                politica_obj = RegistoModelos.politica_qlearning(caminho)
+                print(f"Modelo Q-Learning carregado: {len(politica_obj.tabela)} estados.")
                 
                 agente.politica = politica_obj
                 print (f"Política Q-Learning atribuída ao agente '{id_agente}'.")
@@ -128,7 +141,8 @@ class MotorDeSimulacao:
             
         simulador.ambiente.adicionar_obstaculos(simulador.ambiente.dificuldade)
         #  Inicializar Visualizador
-        simulador.visualizador = Visualizador(30)
+        params_vis = params.get('visualizacao', {})
+        simulador.parametros_visualizacao = (params_vis.get('tamanho_celula', 30), params_vis.get('fps', 5))
         simulador.terminado = False
         
         print(f"Simulação criada com {len(simulador.agentes)} agentes.")
@@ -137,12 +151,17 @@ class MotorDeSimulacao:
 
     def adicionar_agente_programatico(self, agente: AgenteBase, pos_inicial: tuple):
         self.agentes.append(agente)
+        self.estado_agentes.registar(agente)
         self.ambiente.adicionar_agente(agente, pos_inicial)
 
-    def reset(self):
-        """Reinicia o motor e o ambiente."""
+    def reset(self, instantaneo: dict = None):
+        """Reinicia o motor e o ambiente (ou volta ao instantâneo dado, ver AmbienteBase.instantaneo)."""
         self.agentes = []
-        self.ambiente.reset() # Chama o novo método reset do ambiente
+        self.estado_agentes = EstadoAgentes()
+        if instantaneo is None:
+            self.ambiente.reset() # Chama o novo método reset do ambiente
+        else:
+            self.ambiente.restaurar(instantaneo)
         self.terminado = False
         
         # Reinicia as políticas dos agentes (para o passo_atual voltar a 0)
@@ -153,43 +172,150 @@ class MotorDeSimulacao:
     def listaAgentes(self):
         return self.agentes
 
-    def executa(self, max_passos: int, visualizar: bool = True):
-        """Executa a simulação com um máximo de passos e opção de visualização."""
+    def executa(self, max_passos: int, visualizar: bool = True, detetar_ciclos: bool = False):
+        """
+        Executa a simulação com um máximo de passos e opção de visualização.
+        Com detetar_ciclos (só sem visualização), agentes determinísticos que repetem um estado
+        são extrapolados até max_passos em vez de simulados. O resultado dos agentes determinísticos
+        é o mesmo, mas os passos saltados não consomem números de 'random', o que pode mudar os
+        sorteios dos restantes agentes; por isso a deteção é opcional. Com agentes que se bloqueiam
+        (AmbienteBase.bloquear_agentes) o caminho de um agente depende dos outros e a deteção é desligada.
+        """
         print("Iniciando simulação..." if visualizar else "", end="" if not visualizar else "\n")
+        for _ in self._simular(max_passos, visualizar, detetar_ciclos, deltas=False):
+            pass
+
+    def passos(self, max_passos: int, detetar_ciclos: bool = False):
+        """
+        Gerador com a mesma simulação de executa (sem visualização), que produz um
+        simulador.FluxoPassos.DeltaPasso no fim de cada passo: agentes que se moveram, colisões
+        e chegadas ao farol. Os passos extrapolados pela deteção de ciclos não produzem deltas.
+        Parar de consumir o gerador deixa a simulação a meio (sem relatório nem gravação).
+        """
+        return self._simular(max_passos, False, detetar_ciclos, deltas=True)
+
+    def _simular(self, max_passos, visualizar, detetar_ciclos, deltas):
+        """Ciclo de executa e passos; com deltas=False produz None e não recolhe nada por agente."""
+        if deltas:
+            from simulador.FluxoPassos import DeltaPasso
+        detetar_ciclos = detetar_ciclos and not visualizar and not self.ambiente.bloquear_agentes
+        ciclos = DetetorCiclos(self.ambiente, max_passos) if detetar_ciclos else None
+        # Instrumentação (opcional): sem estatísticas, cada fase custa só um teste 'is None'
+        est = self.estatisticas
+        self.ambiente.estatisticas = est
+        if visualizar and self.visualizador is None and self.parametros_visualizacao is not None:
+            from simulador.Visualizador import Visualizador
+            tamanho_celula, fps = self.parametros_visualizacao
+            self.visualizador = Visualizador(tamanho_celula, fps=fps)
+        relogio = time.perf_counter
+
+        # Agentes ativos: os que já chegaram ao farol ficam parados (AgenteBase.age) e saem do ciclo.
+        # O fim é decidido com um contador de chegadas, atualizado só com quem entrou no farol.
+        for agente in self.agentes:
+            self.estado_agentes.registar(agente)
+        por_chegar = {agente for agente in self.agentes if not agente.agente_no_farol}
+        ativos = [agente for agente in self.agentes if agente in por_chegar]
+        chegados = sum(1 for agente in self.agentes if agente not in por_chegar and self.ambiente.agente_no_farol(agente))
+        # Quem começa no farol sem ter chegado é verificado no fim do primeiro passo (como antes)
+        self.ambiente.chegadas = [agente for agente in ativos if self.ambiente.posicoes_agentes.get(agente) == self.ambiente.farol]
         
         while not self.terminado and self.ambiente.passo_atual < max_passos:
             acoes_a_executar = []
+            saidas = False
+            if est is not None: t_fase = relogio()
             
             # 1. Ciclo de Observação e Decisão
-            for agente in self.agentes:
-                obs = self.ambiente.observacaoPara(agente)
+            for agente in ativos:
+                if ciclos is not None and ciclos.acelerar(agente):
+                    saidas = True  # extrapolado até ao fim: deixa de ser simulado
+                    continue
+                if est is not None: t_agente = relogio()
+                obs = self.ambiente.observacaoPara(agente, agente.politica.campos_observacao)
                 agente.receberObservacao(obs)
                 accao = agente.age()
+                if est is not None:
+                    est.registar(f"decisao/{type(agente.politica).__name__}", relogio() - t_agente)
+                if ciclos is not None:
+                    ciclos.registar_decisao(agente, obs)
                 acoes_a_executar.append((agente, accao))
+            if est is not None:
+                t = relogio(); est.registar("observacao_decisao", t - t_fase); t_fase = t
+                colisoes_antes = sum(agente.colisoes for agente, _ in acoes_a_executar)
             
             # 2. Ciclo de Ação
-            for agente, accao in acoes_a_executar:
-                self.ambiente.agir(accao, agente)
+            if deltas:
+                posicoes = self.ambiente.posicoes_agentes
+                movimentos, colisoes = [], []
+                for agente, accao in acoes_a_executar:
+                    antes, colisoes_agente = posicoes.get(agente), agente.colisoes
+                    self.ambiente.agir(accao, agente)
+                    depois = posicoes.get(agente)
+                    if depois != antes:
+                        movimentos.append((agente.id, depois[0], depois[1]))
+                    if agente.colisoes != colisoes_agente:
+                        colisoes.append((agente.id, agente.colisoes - colisoes_agente))
+            else:
+                for agente, accao in acoes_a_executar:
+                    self.ambiente.agir(accao, agente)
+            if est is not None:
+                t = relogio(); est.registar("accao", t - t_fase); t_fase = t
+                est.contar("colisoes_resolvidas", sum(agente.colisoes for agente, _ in acoes_a_executar) - colisoes_antes)
             
             # 3. Atualização do ambiente
             self.ambiente.atualizacao()
+            if est is not None:
+                t = relogio(); est.registar("atualizacao", t - t_fase); t_fase = t
             
             # 4. Desenho (só se ativado)
             if self.visualizador and visualizar:
-                estado_vis = self.ambiente.get_estado_visualizacao()
-                self.visualizador.desenhar(estado_vis)
-                time.sleep(0.2) # Mais lento para visualização normal
+                # O visualizador controla o ritmo (fps) e salta quadros se o desenho se atrasar
+                self.visualizador.mostrar(self.ambiente.get_estado_visualizacao)
+                if est is not None:
+                    t = relogio(); est.registar("desenho", t - t_fase); t_fase = t
                 if not self.visualizador.janela_aberta():
                     print("Janela fechada pelo utilizador. A terminar simulação.")
                     self.terminado = True
                     break
 
-            # 5. Verificar condição de fim           
-            agentes_chegaram = [agente for agente in self.agentes if self.ambiente.agente_no_farol(agente)]
-            if all(self.ambiente.agente_no_farol(agente) for agente in self.agentes):
+            # 5. Verificar condição de fim (só os agentes que entraram no farol neste passo)
+            chegadas = self.ambiente.chegadas
+            if deltas:
+                passo = self.ambiente.passo_atual
+                ids_chegadas = []
+            if chegadas:
+                for agente in chegadas:
+                    if agente in por_chegar and self.ambiente.agente_no_farol(agente):
+                        por_chegar.discard(agente)
+                        chegados += 1
+                        saidas = True
+                        if deltas:
+                            ids_chegadas.append(agente.id)
+                chegadas.clear()
+            if saidas:
+                ativos = [agente for agente in ativos if agente in por_chegar
+                          and (ciclos is None or agente not in ciclos.acelerados)]
+            if chegados == len(self.agentes):
                 if visualizar: print("Todos os agentes no objetivo!")
                 self.terminado = True
+            elif ciclos is not None and not ativos:
+                # Já não há nada para simular: avança o relógio do ambiente até ao fim
+                while self.ambiente.passo_atual < max_passos:
+                    self.ambiente.atualizacao()
+            if est is not None:
+                est.registar("verificacao_fim", relogio() - t_fase)
+                est.contar("passos")
+            yield DeltaPasso(passo, movimentos, colisoes, ids_chegadas) if deltas else None
         
+        self.relatorio_ciclos = ciclos.relatorio() if ciclos is not None else None
+        if est is not None:
+            est.emitir(ambiente=type(self.ambiente).__name__, agentes=len(self.agentes),
+                       passos=self.ambiente.passo_atual, ciclos=self.relatorio_ciclos)
+        if self.visualizador and visualizar and self.visualizador.janela_aberta():
+            # O último passo pode ter sido saltado: mostra sempre o estado final
+            self.visualizador.desenhar(self.ambiente.get_estado_visualizacao())
+        if self.ficheiro_gravacao:
+            guardar_gravacao(self.ficheiro_gravacao, self.ambiente, self.agentes)
+            print(f"Simulação gravada em '{self.ficheiro_gravacao}'.")
         
         agentes_chegaram = [agente for agente in self.agentes if self.ambiente.agente_no_farol(agente)]
         if visualizar:
@@ -1,52 +1,222 @@
 import numpy as np
 
 class NoveltyArchive:
+    # Raio (em células) da procura de vizinhos na grelha de contagens
+    RAIO_GRELHA = 32
+    # Maior grelha de contagens (em células) antes de usar só a comparação direta
+    LIMITE_GRELHA = 1 << 24
+    # Máximo de elementos (consultas x células) de cada bloco da matriz de distâncias
+    TAMANHO_BLOCO = 1 << 22
+    _cache_deslocamentos = None
+
     def __init__(self, k_neighbors=15, threshold=10.0, decay_rate=0.05, limit=500):
-        self.archive = []  # Lista de coordenadas (x, y) de comportamentos passados
         self.k = k_neighbors
         self.threshold = threshold
         self.decay_rate = decay_rate
         self.limit = limit
         self.max_novelty_seen = 1.0 # Para normalização
 
+        # Arquivo de comportamentos passados num buffer circular (o mais antigo é substituído)
+        self._buffer = np.zeros((limit, 2), dtype=np.int64)
+        self._inicio = 0
+        self._tamanho = 0
+        # Índice de contagens por célula: (x, y) -> nº de entradas do arquivo nessa célula
+        self._contagens = {}
+        self._celulas_cache = None
+
+    @property
+    def archive(self):
+        """Lista de coordenadas (x, y) do arquivo, da mais antiga para a mais recente."""
+        indices = (self._inicio + np.arange(self._tamanho)) % max(self.limit, 1)
+        return [(int(x), int(y)) for x, y in self._buffer[indices]]
+
+    def __len__(self):
+        return self._tamanho
+
     def calcular_novelty(self, pos, populacao_atual_posicoes):
         """
-        Calcula a esparsidade (novidade) da posição 'pos' em relação 
+        Calcula a esparsidade (novidade) da posição 'pos' em relação
         ao arquivo histórico e à população atual.
         """
-        # Combina pontos do arquivo com a população atual (menos o próprio agente)
-        comparacao = self.archive + [p for p in populacao_atual_posicoes if p != pos]
-        
-        if not comparacao:
-            return 0.0
-
-        # Distância Euclidiana para todos os pontos
-        pos_arr = np.array(pos)
-        comparacao_arr = np.array(comparacao)
-        dists = np.linalg.norm(comparacao_arr - pos_arr, axis=1)
-        
-        # Ordenar e pegar os k vizinhos mais próximos
-        dists.sort()
-        k_nearest = dists[:self.k]
-        
-        # A pontuação é a média das distâncias aos vizinhos
-        score = np.mean(k_nearest) if len(k_nearest) > 0 else 0.0
-        
+        # Compara com o arquivo e com a população atual (menos as posições iguais à do agente)
+        score = float(self._scores([pos], populacao_atual_posicoes)[0])
+
         if score > self.max_novelty_seen:
             self.max_novelty_seen = score
-            
+
         return score
 
+    def calcular_novelty_lote(self, posicoes):
+        """
+        Novidade de todas as posições da população numa só chamada vetorizada.
+        Cada posição é comparada com o arquivo e com as restantes posições da população,
+        tal como em calcular_novelty(pos, posicoes); o arquivo não muda durante a chamada.
+        """
+        scores = self._scores(posicoes, posicoes)
+        if len(scores) and scores.max() > self.max_novelty_seen:
+            self.max_novelty_seen = float(scores.max())
+        return scores
+
+    def _scores(self, consultas, populacao):
+        consultas = np.asarray(consultas, dtype=np.int64).reshape(-1, 2)
+        populacao = np.asarray(populacao, dtype=np.int64).reshape(-1, 2)
+        if len(consultas) == 0:
+            return np.zeros(0)
+        celulas_arquivo, contagens_arquivo = self._celulas_arquivo()
+
+        # Cada célula distinta das consultas só é avaliada uma vez
+        unicas, inverso = np.unique(consultas, axis=0, return_inverse=True)
+        inverso = inverso.reshape(-1)
+        scores = np.full(len(unicas), np.nan)
+
+        tudo = np.concatenate([celulas_arquivo, populacao, unicas])
+        minimo, maximo = tudo.min(axis=0), tudo.max(axis=0)
+        r = self.RAIO_GRELHA
+        forma = (int(maximo[1] - minimo[1]) + 1 + 2 * r, int(maximo[0] - minimo[0]) + 1 + 2 * r)
+        if forma[0] * forma[1] <= self.LIMITE_GRELHA:
+            scores = self._scores_grelha(unicas, populacao, celulas_arquivo, contagens_arquivo, minimo, forma)
+
+        # Consultas sem k vizinhos dentro do raio da grelha: comparação direta com todas as células
+        pendentes = np.isnan(scores)
+        if pendentes.any():
+            scores[pendentes] = self._scores_diretos(unicas[pendentes], populacao,
+                                                     celulas_arquivo, contagens_arquivo)
+        return scores[inverso]
+
+    def _scores_grelha(self, consultas, populacao, celulas_arquivo, contagens_arquivo, minimo, forma):
+        """
+        Procura os vizinhos numa grelha de contagens, percorrendo os deslocamentos por ordem
+        crescente de distância até juntar k vizinhos. Devolve NaN para as consultas que
+        não os encontram dentro de RAIO_GRELHA.
+        """
+        r = self.RAIO_GRELHA
+        origem = minimo - r
+        grelha = np.zeros(forma, dtype=np.int64)
+        np.add.at(grelha, (celulas_arquivo[:, 1] - origem[1], celulas_arquivo[:, 0] - origem[0]), contagens_arquivo)
+        grelha_pop = np.zeros(forma, dtype=np.int64)
+        np.add.at(grelha_pop, (populacao[:, 1] - origem[1], populacao[:, 0] - origem[0]), 1)
+        grelha += grelha_pop
+
+        qx = consultas[:, 0] - origem[0]
+        qy = consultas[:, 1] - origem[1]
+        # A população na mesma célula da consulta não conta como vizinha
+        proprios = grelha_pop[qy, qx]
+
+        off_x, off_y, off_d = self._deslocamentos()
+        soma = np.zeros(len(consultas))
+        contados = np.zeros(len(consultas), dtype=np.int64)
+        ativas = np.arange(len(consultas))
+        for i in range(0, len(off_d), 256):
+            ox, oy, od = off_x[i:i + 256], off_y[i:i + 256], off_d[i:i + 256]
+            pesos = grelha[qy[ativas, None] + oy, qx[ativas, None] + ox]
+            if i == 0:
+                pesos[:, 0] -= proprios[ativas]  # o deslocamento (0, 0) é sempre o primeiro
+            antes = contados[ativas, None] + np.cumsum(pesos, axis=1) - pesos
+            usados = np.clip(self.k - antes, 0, pesos)
+            soma[ativas] += (usados * od).sum(axis=1)
+            contados[ativas] += usados.sum(axis=1)
+            ativas = ativas[contados[ativas] < self.k]
+            if len(ativas) == 0:
+                break
+
+        scores = np.divide(soma, contados, out=np.zeros(len(consultas)), where=contados > 0)
+        scores[ativas] = np.nan
+        return scores
+
+    @classmethod
+    def _deslocamentos(cls):
+        if cls._cache_deslocamentos is None:
+            r = cls.RAIO_GRELHA
+            oy, ox = np.mgrid[-r:r + 1, -r:r + 1]
+            d = np.sqrt(ox ** 2 + oy ** 2)
+            dentro = d <= r
+            ordem = np.argsort(d[dentro], kind="stable")
+            cls._cache_deslocamentos = (ox[dentro][ordem], oy[dentro][ordem], d[dentro][ordem])
+        return cls._cache_deslocamentos
+
+    def _scores_diretos(self, consultas, populacao, celulas_arquivo, contagens_arquivo):
+        # Células distintas (arquivo + população + consultas) e respetivas contagens
+        celulas, inverso = np.unique(np.concatenate([celulas_arquivo, populacao, consultas]),
+                                     axis=0, return_inverse=True)
+        inverso = inverso.reshape(-1)
+        n_arq, n_pop = len(celulas_arquivo), len(populacao)
+        pesos_base = np.zeros(len(celulas), dtype=np.int64)
+        pesos_base[inverso[:n_arq]] += contagens_arquivo
+        contagens_pop = np.bincount(inverso[n_arq:n_arq + n_pop], minlength=len(celulas))
+        pesos_base += contagens_pop
+        celula_consulta = inverso[n_arq + n_pop:]
+
+        scores = np.zeros(len(consultas))
+        bloco = max(1, self.TAMANHO_BLOCO // len(celulas))
+        for i in range(0, len(consultas), bloco):
+            q = celula_consulta[i:i + bloco]
+            # A população na mesma célula da consulta não conta como vizinha
+            pesos = np.broadcast_to(pesos_base, (len(q), len(celulas))).copy()
+            pesos[np.arange(len(q)), q] -= contagens_pop[q]
+            diff = celulas[q][:, None, :] - celulas[None, :, :]
+            dists = np.sqrt((diff ** 2).sum(axis=2))
+            scores[i:i + bloco] = self._media_k_vizinhos(dists, pesos)
+        return scores
+
+    def _media_k_vizinhos(self, dists, pesos):
+        """Média das k menores distâncias, contando cada célula tantas vezes quanto o seu peso."""
+        dists = np.where(pesos > 0, dists, np.inf)
+        k_celulas = min(self.k, dists.shape[1])
+        if k_celulas < dists.shape[1]:
+            # Cada célula com peso tem pelo menos 1 ocorrência: bastam as k células mais próximas
+            idx = np.argpartition(dists, k_celulas - 1, axis=1)[:, :k_celulas]
+            dists = np.take_along_axis(dists, idx, axis=1)
+            pesos = np.take_along_axis(pesos, idx, axis=1)
+        ordem = np.argsort(dists, axis=1)
+        dists = np.take_along_axis(dists, ordem, axis=1)
+        pesos = np.take_along_axis(pesos, ordem, axis=1)
+
+        antes = np.cumsum(pesos, axis=1) - pesos
+        usados = np.clip(self.k - antes, 0, pesos)
+        total = usados.sum(axis=1)
+        soma = (np.where(usados > 0, dists, 0.0) * usados).sum(axis=1)
+        return np.divide(soma, total, out=np.zeros(len(total)), where=total > 0)
+
+    def _celulas_arquivo(self):
+        if self._celulas_cache is None:
+            if self._contagens:
+                celulas = np.array(list(self._contagens.keys()), dtype=np.int64)
+                contagens = np.array(list(self._contagens.values()), dtype=np.int64)
+            else:
+                celulas = np.zeros((0, 2), dtype=np.int64)
+                contagens = np.zeros(0, dtype=np.int64)
+            self._celulas_cache = (celulas, contagens)
+        return self._celulas_cache
+
     def tentar_adicionar(self, pos, score):
-        # Se o arquivo estiver cheio, removemos aleatoriamente ou o menos novo (aqui removemos aleatório para simplificar a diversidade)
+        # Se o arquivo estiver cheio, a nova entrada substitui a mais antiga (buffer circular)
         if score > self.threshold:
-            if len(self.archive) >= self.limit:
-                self.archive.pop(0) # Remove o mais antigo
-            self.archive.append(pos)
+            self._adicionar(pos)
             return True
         return False
 
+    def tentar_adicionar_lote(self, posicoes, scores):
+        """Equivalente a chamar tentar_adicionar para cada par (posição, score), por ordem."""
+        return [self.tentar_adicionar(pos, score) for pos, score in zip(posicoes, scores)]
+
+    def _adicionar(self, pos):
+        if self.limit <= 0:
+            return
+        celula = (int(pos[0]), int(pos[1]))
+        if self._tamanho == self.limit:
+            antiga = (int(self._buffer[self._inicio, 0]), int(self._buffer[self._inicio, 1]))
+            self._contagens[antiga] -= 1
+            if self._contagens[antiga] == 0:
+                del self._contagens[antiga]
+            self._buffer[self._inicio] = celula
+            self._inicio = (self._inicio + 1) % self.limit
+        else:
+            self._buffer[(self._inicio + self._tamanho) % self.limit] = celula
+            self._tamanho += 1
+        self._contagens[celula] = self._contagens.get(celula, 0) + 1
+        self._celulas_cache = None
+
     def decair(self):
         self.threshold *= (1.0 + self.decay_rate)
         # Opcional: Limitar o threshold máximo
-        self.threshold = min(self.threshold, 50.0)
\ No newline at end of file
+        self.threshold = min(self.threshold, 50.0)
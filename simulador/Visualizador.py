@@ -1,15 +1,57 @@
 # Em simulador/Visualizador.py
+import time
 import tkinter as tk
 
 class Visualizador:
-    def __init__(self, tamanho_celula=25):
+    # Limites de quadros desenhados por segundo (o mínimo evita que a imagem congele quando a simulação se atrasa)
+    FPS_MAXIMO = 30
+    FPS_MINIMO = 4
+
+    def __init__(self, tamanho_celula=25, fps=5):
         self.tamanho = tamanho_celula
+        # Passos de simulação mostrados por segundo (None = o mais rápido possível)
+        self.fps = fps
         self.janela = tk.Tk()
         self.janela.title("Simulador Multi-Agente")
         self.canvas = None
+        # Camada estática (grelha, obstáculos, farol): só é redesenhada quando a chave muda
+        self._chave_estatica = None
+        # Um oval por agente, movido com canvas.coords em vez de recriado
+        self._itens_agentes = []
+        # Escalonador de quadros
+        self._prazo = None
+        self._ultimo_desenho = 0.0
+        self.quadros_desenhados = 0
+        self.quadros_saltados = 0
+
+    def mostrar(self, obter_estado):
+        """
+        Chamado uma vez por passo de simulação. Mantém o ritmo de 'fps' passos por segundo:
+        espera se a simulação estiver adiantada e, se estiver atrasada (desenho lento),
+        salta quadros em vez de abrandar a simulação. 'obter_estado' só é chamado quando
+        o quadro é mesmo desenhado.
+        """
+        agora = time.perf_counter()
+        intervalo = 1.0 / self.fps if self.fps else 0.0
+        if self._prazo is None or agora - self._prazo > 1.0:
+            self._prazo = agora  # primeiro passo ou pausa longa: volta a sincronizar
+        self._prazo += intervalo
+
+        desde_ultimo = agora - self._ultimo_desenho
+        atrasado = intervalo > 0 and agora > self._prazo
+        if (not atrasado and desde_ultimo >= 1.0 / self.FPS_MAXIMO) or desde_ultimo >= 1.0 / self.FPS_MINIMO:
+            self.desenhar(obter_estado())
+            self._ultimo_desenho = time.perf_counter()
+            self.quadros_desenhados += 1
+        else:
+            self.quadros_saltados += 1
+
+        espera = self._prazo - time.perf_counter()
+        if espera > 0:
+            time.sleep(espera)
 
     def desenhar(self, estado: dict):
-        # estado = { "largura": 10, "altura": 10, "farol": (5,5), "agentes": [(0,0), (1,1)] }
+        # estado = { "largura": 10, "altura": 10, "farol": (5,5), "agentes": [(0,0), (1,1)], "obstaculos": [...] }
         try:
             # Verifica se a janela ainda existe
             if not self.janela.winfo_exists():
@@ -22,37 +64,67 @@ class Visualizador:
                 self.canvas = tk.Canvas(self.janela, width=largura_px, height=altura_px)
                 self.canvas.pack()
 
-            self.canvas.delete("all")
-
-            # Desenhar grelha
-            for x in range(estado["largura"]):
-                for y in range(estado["altura"]):
-                    self.canvas.create_rectangle(x * self.tamanho, y * self.tamanho, (x+1) * self.tamanho, (y+1) * self.tamanho, fill="white", outline="lightgray")
-            
-            # Desenhar obstaculos
-            for (ax, ay) in estado["obstaculos"]:
-                self.canvas.create_rectangle(ax * self.tamanho, ay * self.tamanho, (ax+1) * self.tamanho, (ay+1) * self.tamanho, fill="black", outline="gray")
+            chave = (estado["largura"], estado["altura"], estado["farol"],
+                     estado.get("versao_obstaculos", id(estado["obstaculos"])))
+            if chave != self._chave_estatica:
+                self._desenhar_estatico(estado)
+                self._chave_estatica = chave
 
-            # Desenhar farol
-            fx, fy = estado["farol"]
-            self.canvas.create_oval(fx * self.tamanho + 5, fy * self.tamanho + 5, (fx+1) * self.tamanho - 5, (fy+1) * self.tamanho - 5, fill="yellow")
-
-            cores = ["blue", "red", "green", "orange", "purple", "pink"]
-
-            # Desenhar agentes
-            for i, (ax, ay) in enumerate(estado["agentes"]):
-                cor = cores[i % len(cores)]  # roda a lista se houver mais agentes que cores
-                self.canvas.create_oval(
-                    ax * self.tamanho + 5, ay * self.tamanho + 5,
-                    (ax+1) * self.tamanho - 5, (ay+1) * self.tamanho - 5,
-                    fill=cor
-        )
+            self._desenhar_agentes(estado["agentes"])
             self.canvas.update()
         except tk.TclError:
             return
 
+    def _desenhar_estatico(self, estado):
+        t = self.tamanho
+        largura, altura = estado["largura"], estado["altura"]
+        self.canvas.config(width=largura * t, height=altura * t)
+        self.canvas.delete("estatico")
+
+        # Desenhar grelha (fundo + linhas, em vez de um retângulo por célula)
+        self.canvas.create_rectangle(0, 0, largura * t, altura * t, fill="white", outline="lightgray", tags="estatico")
+        for x in range(1, largura):
+            self.canvas.create_line(x * t, 0, x * t, altura * t, fill="lightgray", tags="estatico")
+        for y in range(1, altura):
+            self.canvas.create_line(0, y * t, largura * t, y * t, fill="lightgray", tags="estatico")
+
+        # Desenhar obstaculos
+        for (ax, ay) in estado["obstaculos"]:
+            self.canvas.create_rectangle(ax * t, ay * t, (ax+1) * t, (ay+1) * t, fill="black", outline="gray", tags="estatico")
+
+        # Desenhar farol
+        if estado["farol"]:
+            fx, fy = estado["farol"]
+            self.canvas.create_oval(fx * t + 5, fy * t + 5, (fx+1) * t - 5, (fy+1) * t - 5, fill="yellow", tags="estatico")
+
+        # Os agentes ficam sempre por cima da camada estática
+        self.canvas.tag_lower("estatico")
+
+    def _desenhar_agentes(self, posicoes):
+        t = self.tamanho
+        cores = ["blue", "red", "green", "orange", "purple", "pink"]
+
+        # Criar/remover ovais só quando o número de agentes muda
+        while len(self._itens_agentes) < len(posicoes):
+            cor = cores[len(self._itens_agentes) % len(cores)]  # roda a lista se houver mais agentes que cores
+            self._itens_agentes.append(self.canvas.create_oval(0, 0, 0, 0, fill=cor, tags="agente"))
+        while len(self._itens_agentes) > len(posicoes):
+            self.canvas.delete(self._itens_agentes.pop())
+
+        # Mover os agentes
+        for item, (ax, ay) in zip(self._itens_agentes, posicoes):
+            self.canvas.coords(item, ax * t + 5, ay * t + 5, (ax+1) * t - 5, (ay+1) * t - 5)
+
+    def reproduzir(self, gravacao):
+        """Revê uma simulação gravada (ambiente.Trajetorias.Gravacao) sem voltar a correr as políticas."""
+        for passo in range(gravacao.num_passos + 1):
+            self.mostrar(lambda: gravacao.estado_no_passo(passo))
+            if not self.janela_aberta():
+                return
+        self.desenhar(gravacao.estado_no_passo(gravacao.num_passos))
+
     def janela_aberta(self):
             try:
                 return self.janela.winfo_exists()
             except tk.TclError:
-                return False
\ No newline at end of file
+                return False
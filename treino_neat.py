@@ -1,14 +1,17 @@
 from ambiente.AmbienteMaze import AmbienteMaze
 from ambiente.AmbienteFarol import AmbienteFarol
+from ambiente.AmbienteLote import AmbienteLote
 from agentes.Sensor import Sensor
 from agentes.Agente import AgenteBase
-from agentes.Politicas import PoliticaRedeNeuronal
+from agentes.Politicas import PoliticaRedeNeuronal, ACOES_REDE
+from agentes.RedeCompilada import RedeCompilada, PopulacaoCompilada
 from simulador.MotorDeSimulacao import MotorDeSimulacao
+from simulador.Instrumentacao import Estatisticas
 from simulador.NoveltyArchive import NoveltyArchive
 
-import matplotlib.pyplot as plt
+import multiprocessing
+import numpy as np
 import os
-import random
 import neat
 import pickle
 
@@ -16,28 +19,45 @@ import pickle
 MAX_PASSOS = 70
 GERACOES = 150
 DIFICULDADE = 2
+PROCESSOS = 1  # > 1 avalia os genomas num pool de processos (resultados iguais ao modo série)
+LOTE = False  # True avalia a população de uma só vez (AmbienteLote + redes compiladas)
+ESTATISTICAS = None  # Ficheiro .jsonl para registar os tempos por fase de cada simulação (None = desligado)
 
 # Inicializa o Arquivo de Novelty (Global para persistir entre gerações)
 arquivo_novelty = NoveltyArchive(threshold=5.0, decay_rate=0.02)
 USAR_MAZE = True  # Alternar entre Maze e Farol
 
-def eval_genomes(genomes, config):
-    # Função de avaliação chamada pelo NEAT a cada geração.
-    sim = MotorDeSimulacao()
-    # Cria o ambiente manualmente (sem JSON)
-    if USAR_MAZE:
-        sim.ambiente = AmbienteMaze(DIFICULDADE)
-        print(f"Usando Ambiente Maze com largura {sim.ambiente.largura}")
-    else:
-        sim.ambiente = AmbienteFarol(largura=15, altura=10)
+def criar_ambiente(usar_maze=None, dificuldade=None):
+    usar_maze = USAR_MAZE if usar_maze is None else usar_maze
+    dificuldade = DIFICULDADE if dificuldade is None else dificuldade
+    if usar_maze:
+        return AmbienteMaze(dificuldade)
+    return AmbienteFarol(largura=15, altura=10)
+
+# Ambientes já construídos (sem agentes nem estado), por (usar_maze, dificuldade)
+_ambientes_preparados = {}
+
+def ambiente_preparado(usar_maze=None, dificuldade=None):
+    """Clone de um ambiente construído uma só vez: partilha os obstáculos e as tabelas de inputs."""
+    chave = (USAR_MAZE if usar_maze is None else usar_maze, DIFICULDADE if dificuldade is None else dificuldade)
+    ambiente = _ambientes_preparados.get(chave)
+    if ambiente is None:
+        ambiente = _ambientes_preparados[chave] = criar_ambiente(*chave)
+    return ambiente.clonar()
+
+def simular_genomas(genomes, config, ambiente):
+    """
+    Corre os genomas (todos em (1, 1)) no ambiente dado e devolve, por genoma,
+    (posicao_final, colisoes, distancia_ao_objetivo, chegou_ao_objetivo), e o relatório
+    da deteção de ciclos (DetetorCiclos.relatorio).
+    """
+    sim = MotorDeSimulacao(ambiente)
     sim.agentes = []
-    
-    # Criar redes neurais e agentes para cada genoma
-    agentes_e_genomas = []
-    
+    if ESTATISTICAS:
+        sim.estatisticas = Estatisticas(ESTATISTICAS)
+    agentes = []
+
     for genome_id, genome in genomes:
-        genome.fitness = 0.0
-        
         # 1. Criar a rede neural (Fenótipo)
         net = neat.nn.FeedForwardNetwork.create(genome, config)
         
@@ -54,16 +74,106 @@ def eval_genomes(genomes, config):
         for dir in direcoes_sensores:
             sensor = Sensor(direcao=dir, movimentos=1)
             agente.instala(sensor)
-        x = random.randint(0, 15)
-        y = random.randint(0, 10)
         sim.adicionar_agente_programatico(agente, pos_inicial=(1, 1))
-        
-        agentes_e_genomas.append((agente, genome))
+        agentes.append(agente)
+
+    # Executar sem visualização para ser rápido; as redes são determinísticas,
+    # por isso os agentes presos num ciclo podem ser extrapolados até ao fim
+    sim.executa(max_passos=MAX_PASSOS, visualizar=False, detetar_ciclos=True)
+
+    return [(ambiente.posicoes_agentes[ag], ag.colisoes, ambiente.dist_to_exit(ag), ambiente.agente_no_farol(ag))
+            for ag in agentes], sim.relatorio_ciclos
+
+def simular_genomas_lote(genomes, config, ambiente):
+    """
+    Igual a simular_genomas, mas com toda a população num AmbienteLote: as redes são
+    compiladas em matrizes e ativadas de uma só vez, com os inputs lidos da tabela por célula.
+    Não há deteção de ciclos, por isso o relatório é None.
+    """
+    redes = PopulacaoCompilada([RedeCompilada.compilar(genome, config) for _, genome in genomes])
+    sensores = [Sensor(direcao=dir, movimentos=1) for dir in [[0, -1], [0, 1], [-1, 0], [1, 0]]]
+    tabela = ambiente.tabela_inputs_neurais(sensores)
+    acoes = np.array(ACOES_REDE, dtype=np.int64)
+
+    def decidir(lote):
+        inputs = tabela[lote.posicoes[:, 1], lote.posicoes[:, 0]]
+        return acoes[np.argmax(redes.ativar(inputs), axis=1)]
+
+    lote = AmbienteLote(ambiente, [(1, 1)] * len(genomes))
+    lote.executa(decidir, MAX_PASSOS)
+    lote.verificar_farol()
+
+    return [(pos, int(colisoes), float(dist), bool(chegou))
+            for pos, colisoes, dist, chegou in zip(lote.posicoes_finais(), lote.colisoes,
+                                                   lote.distancias_ao_farol(), lote.no_farol)], None
+
+def somar_relatorios(relatorios):
+    """Junta os relatórios de ciclos dos blocos de uma geração (None se nenhum bloco os teve)."""
+    relatorios = [r for r in relatorios if r is not None]
+    if not relatorios:
+        return None
+    executados = sum(r["passos_executados"] for r in relatorios)
+    poupados = sum(r["passos_poupados"] for r in relatorios)
+    return {
+        "agentes_acelerados": sum(r["agentes_acelerados"] for r in relatorios),
+        "passos_executados": executados,
+        "passos_poupados": poupados,
+        "speedup": (executados + poupados) / executados if executados else 1.0,
+    }
+
+def simular(genomes, config, ambiente, lote=None):
+    lote = LOTE if lote is None else lote
+    if lote:
+        return simular_genomas_lote(genomes, config, ambiente)
+    return simular_genomas(genomes, config, ambiente)
+
+# --- Avaliação paralela ---
+# Cada processo recebe um ambiente já preparado e usa um clone dele em cada bloco.
+_ambiente_trabalhador = None
+_config_trabalhador = None
+_lote_trabalhador = False
+
+def _iniciar_trabalhador(config, ambiente, lote=False):
+    global _ambiente_trabalhador, _config_trabalhador, _lote_trabalhador
+    _config_trabalhador = config
+    _ambiente_trabalhador = ambiente
+    _lote_trabalhador = lote
+
+def _simular_bloco(tarefa):
+    genomes, obstaculos = tarefa
+    ambiente = _ambiente_trabalhador.clonar()
+    if obstaculos is not None:
+        ambiente.definir_obstaculos(obstaculos)
+    return simular(genomes, _config_trabalhador, ambiente, _lote_trabalhador)
+
+pool_avaliacao = None  # multiprocessing.Pool criado em run() quando PROCESSOS > 1
+
+def eval_genomes(genomes, config):
+    # Função de avaliação chamada pelo NEAT a cada geração.
+    # Clone do ambiente preparado (sem JSON nem reconstruir o mapa)
+    ambiente = ambiente_preparado()
+    if USAR_MAZE:
+        print(f"Usando Ambiente Maze com largura {ambiente.largura}")
+
+    for genome_id, genome in genomes:
+        genome.fitness = 0.0
+
+    # Os obstáculos são colocados com os agentes já na posição inicial (1, 1),
+    # e são gerados aqui (no processo principal) para os dois modos usarem o mesmo mapa.
+    ambiente.adicionar_agente(AgenteBase(id="posicao_inicial"), (1, 1))
+    ambiente.adicionar_obstaculos(dificuldade=2)
+    ambiente.reset()
 
     # --- Executar Simulação ---
-    # Executar sem visualização para ser rápido
-    sim.ambiente.adicionar_obstaculos(dificuldade=2)    
-    sim.executa(max_passos=MAX_PASSOS, visualizar=False)
+    if pool_avaliacao is None:
+        resultados, relatorio_ciclos = simular(genomes, config, ambiente)
+    else:
+        obstaculos = None if USAR_MAZE else [(o.dx, o.dy) for o in ambiente.obstaculos]
+        tamanho_bloco = max(1, -(-len(genomes) // (PROCESSOS * 4)))
+        blocos = [(genomes[i:i + tamanho_bloco], obstaculos) for i in range(0, len(genomes), tamanho_bloco)]
+        por_bloco = pool_avaliacao.map(_simular_bloco, blocos)
+        resultados = [r for bloco, _ in por_bloco for r in bloco]
+        relatorio_ciclos = somar_relatorios(relatorio for _, relatorio in por_bloco)
 
     # a= 90.0, b= 50.0, c= 40.0 funciona +- com dificuldade = 2 para farol
     # a= 70.0, b= 100.0, c= 20.0 funciona bem com maze dificuldade 3 PRIORIZAR NOVELTY
@@ -72,24 +182,16 @@ def eval_genomes(genomes, config):
     b = 120.0
     c = 20.0
     
-    posicoes_finais = [sim.ambiente.posicoes_agentes[ag] for ag, _ in agentes_e_genomas]
+    posicoes_finais = [pos_final for pos_final, _, _, _ in resultados]
+    # 2. Componente Novelty (toda a população numa só chamada, contra o arquivo desta geração)
+    scores_novelty = arquivo_novelty.calcular_novelty_lote(posicoes_finais)
     
-    for agente, genome in agentes_e_genomas:
-        pos_final = sim.ambiente.posicoes_agentes[agente]
-        
-        dist = sim.ambiente.dist_to_exit(agente)
+    for (genome_id, genome), (pos_final, num_colisoes, dist, chegou), score_novelty in zip(genomes, resultados, scores_novelty):
         # Evitar divisão por zero
         score_objetivo = 1.0 / (dist + 0.1) 
-        if sim.ambiente.agente_no_farol(agente):
+        if chegou:
             score_objetivo += 2.0 # Bónus extra por chegar
 
-        # 2. Componente Novelty
-        score_novelty = arquivo_novelty.calcular_novelty(pos_final, posicoes_finais)
-        
-        # Adicionar ao arquivo se for relevante
-        arquivo_novelty.tentar_adicionar(pos_final, score_novelty)
-
-        num_colisoes = agente.colisoes
         score_penalizacao = c * num_colisoes
 
         # 3. Fitness Combinado
@@ -97,10 +199,15 @@ def eval_genomes(genomes, config):
         fitness_final = (a * score_objetivo) + (b * score_novelty) - score_penalizacao
         genome.fitness = max(0,fitness_final)  # Garantir fitness não negativo
 
+    # Adicionar ao arquivo as posições relevantes
+    arquivo_novelty.tentar_adicionar_lote(posicoes_finais, scores_novelty)
 
     # Aplicar Decaimento do Arquivo (Fim da geração)
     arquivo_novelty.decair()
-    print(f"Arquivo Novelty: {len(arquivo_novelty.archive)} itens. Threshold atual: {arquivo_novelty.threshold:.2f}")
+    print(f"Arquivo Novelty: {len(arquivo_novelty)} itens. Threshold atual: {arquivo_novelty.threshold:.2f}")
+    if relatorio_ciclos is not None:
+        print(f"Ciclos: {relatorio_ciclos['agentes_acelerados']} agentes extrapolados, "
+              f"{relatorio_ciclos['passos_poupados']} agente-passos poupados (speedup {relatorio_ciclos['speedup']:.2f}x)")
 
 
 def run(config_file):
@@ -119,7 +226,17 @@ def run(config_file):
 
     # --- RODAR A EVOLUÇÃO ---
     # Chama eval_genomes por X gerações
-    vencedor = p.run(eval_genomes, GERACOES)
+    global pool_avaliacao
+    if PROCESSOS > 1:
+        pool_avaliacao = multiprocessing.Pool(PROCESSOS, initializer=_iniciar_trabalhador,
+                                              initargs=(config, ambiente_preparado(), LOTE))
+    try:
+        vencedor = p.run(eval_genomes, GERACOES)
+    finally:
+        if pool_avaliacao is not None:
+            pool_avaliacao.close()
+            pool_avaliacao.join()
+            pool_avaliacao = None
     
     caminho_arquivo = os.path.join('vencedores', 'vencedor.pkl')
     with open(caminho_arquivo, 'wb') as f:
@@ -132,7 +249,8 @@ def run(config_file):
     melhor_fitness = [c.fitness for c in stats.most_fit_genomes]
     geracoes = range(len(media_fitness))
 
-    # Mostrar gráfico de fitness
+    # Mostrar gráfico de fitness (matplotlib só é importado aqui: os trabalhadores não precisam dele)
+    import matplotlib.pyplot as plt
     plt.figure(figsize=(10, 5))
     # Plota a média
     plt.plot(geracoes, media_fitness, label="Média Fitness")
@@ -1,43 +1,51 @@
 from agentes.Agente import AgenteBase
 from agentes.Politicas import PoliticaQLearning
+from agentes.TabelaQ import ACOES
 from agentes.Sensor import Sensor # Importante se o ambiente depender da criação de sensores
 from simulador.MotorDeSimulacao import MotorDeSimulacao
 from ambiente.AmbienteMaze import AmbienteMaze
 from ambiente.AmbienteFarol import AmbienteFarol
+from ambiente.AmbienteLote import AmbienteLote
 
-import matplotlib.pyplot as plt
 import pickle
 import os
 import math
+import random
 import time
+import numpy as np
 # Configurações
 MAX_PASSOS = 60
 EPISODIOS = 1000
 DIFICULDADE = 1
 USAR_MAZE = True
+COPIAS = 1  # > 1 treina vários episódios em simultâneo (modo vetorizado; 10-25 mantém a qualidade do treino)
 
-def run_training():
-    print("=== INICIANDO TREINO Q-LEARNING (MODO NATIVO) ===")
-    
-    # 1. Setup do Ambiente e Motor
-    sim = MotorDeSimulacao()
+def criar_ambiente():
     if USAR_MAZE:
-        sim.ambiente = AmbienteMaze(dificuldade=DIFICULDADE)
+        ambiente = AmbienteMaze(dificuldade=DIFICULDADE)
     else:
-        sim.ambiente = AmbienteFarol(largura=15, altura=10, dificuldade=DIFICULDADE)
-    
-    sim.ambiente.adicionar_obstaculos()
+        ambiente = AmbienteFarol(largura=15, altura=10, dificuldade=DIFICULDADE)
+    ambiente.adicionar_obstaculos()
+    return ambiente
+
+
+def treinar(episodios=EPISODIOS):
+    """Treino episódio a episódio com um único agente. Devolve (política, recompensas por episódio)."""
+    # 1. Setup do Ambiente e Motor
+    sim = MotorDeSimulacao()
+    sim.ambiente = criar_ambiente()
 
     # 2. Criar Agente e Política
     # Criamos a política UMA vez para manter a memória (Q-Table)
     politica_ql = PoliticaQLearning(alpha=0.1,gamma=0.9,epsilon=1.0) # Começa totalmente aleatório
         
-    start_time = time.time()
     historico_recompensas = []
+    # Ambiente preparado (obstáculos, sem agentes): cada episódio volta a este estado
+    inicial = sim.ambiente.instantaneo()
 
-    for ep in range(EPISODIOS):
+    for ep in range(episodios):
         # Reset para novo episódio
-        sim.reset() 
+        sim.reset(inicial)
         
         # Criar/Reiniciar agente
         agente = AgenteBase(id=f"treino_{ep}")
@@ -109,11 +117,103 @@ def run_training():
 
         if (ep+1) % 100 == 0:
             media = sum(historico_recompensas[-100:]) / 100
-            print(f"Ep {ep+1}/{EPISODIOS} | Rec: {media:.2f} | Epsilon: {politica_ql.epsilon:.3f}")
+            print(f"Ep {ep+1}/{episodios} | Rec: {media:.2f} | Epsilon: {politica_ql.epsilon:.3f}")
+
+    return politica_ql, historico_recompensas
+
+
+def treinar_vetorizado(episodios=EPISODIOS, copias=COPIAS):
+    """
+    Treino com 'copias' episódios independentes em simultâneo sobre um AmbienteLote.
+    A escolha epsilon-greedy e as atualizações de Bellman são feitas em lote sobre a mesma
+    tabela Q, com a mesma recompensa do treino normal. Devolve (política, recompensas por episódio).
+    """
+    ambiente = criar_ambiente()
+    politica_ql = PoliticaQLearning(alpha=0.1,gamma=0.9,epsilon=1.0) # Começa totalmente aleatório
+    tabela = politica_ql.tabela
+    tabela.garantir(ambiente.largura - 1, ambiente.altura - 1)
+    acoes = np.array(ACOES, dtype=np.int64)
+    rng = np.random.default_rng(random.getrandbits(64))
+
+    historico_recompensas = []
+    while len(historico_recompensas) < episodios:
+        n = min(copias, episodios - len(historico_recompensas))
+        lote = AmbienteLote(ambiente, [(1, 1)] * n)
+        total_recompensa = np.zeros(n)
+        done = np.zeros(n, dtype=bool)
 
-        sim.ambiente.reset()
+        for _ in range(MAX_PASSOS):
+            ativos = ~done
+            if not ativos.any():
+                break
+            pos_anterior = lote.posicoes.copy()
+            x, y = pos_anterior[:, 0], pos_anterior[:, 1]
+            tabela.visitados[y[ativos], x[ativos]] = True
+
+            # A. Decisão epsilon-greedy em lote
+            explorar = rng.random(n) < politica_ql.epsilon
+            indices = np.where(explorar, rng.integers(0, len(ACOES), n),
+                               tabela.acoes_gulosas(x, y, rng.random(n)))
+            acoes_lote = acoes[indices]
+            acoes_lote[done] = 0
+
+            # B. Executar Ação no Ambiente
+            lote.agir(acoes_lote)
+            pos_nova = lote.posicoes
+            nx, ny = pos_nova[:, 0], pos_nova[:, 1]
+
+            # C. Recompensa (igual ao treino normal)
+            recompensa = -0.1 - 0.01 * lote.colisoes
+            if ambiente.farol:
+                fx, fy = ambiente.farol
+                dist_ant = np.hypot(x - fx, y - fy)
+                dist_nov = np.hypot(nx - fx, ny - fy)
+                recompensa = recompensa + np.where(dist_nov < dist_ant, 0.1, 0.0)
+                chegou = (nx == fx) & (ny == fy)
+                recompensa = np.where(chegou, 100.0, recompensa)
+            else:
+                chegou = np.zeros(n, dtype=bool)
+            parado = (x == nx) & (y == ny)
+            recompensa = np.where(parado, -1.0, recompensa)
+
+            # D. Atualização de Bellman em lote (só episódios ativos)
+            tabela.visitados[ny[ativos], nx[ativos]] = True
+            sx, sy, a = x[ativos], y[ativos], indices[ativos]
+            alvo = recompensa[ativos] + politica_ql.gamma * tabela.valores[ny[ativos], nx[ativos]].max(axis=1)
+            # Pares (estado, ação) repetidos no lote: usa o alvo médio e aplica-o como k
+            # atualizações seguidas, para o passo efetivo não crescer com o número de cópias
+            chave = np.ravel_multi_index((sy, sx, a), tabela.valores.shape)
+            chaves, inverso, k = np.unique(chave, return_inverse=True, return_counts=True)
+            alvo_medio = np.bincount(inverso.reshape(-1), weights=alvo) / k
+            valores = tabela.valores.reshape(-1)
+            valores[chaves] += (1.0 - (1.0 - politica_ql.alpha) ** k) * (alvo_medio - valores[chaves])
+
+            total_recompensa[ativos] += recompensa[ativos]
+            done |= ativos & chegou
+
+        # Fim dos episódios - Decaimento do Epsilon (uma vez por episódio)
+        for recompensa_ep in total_recompensa:
+            historico_recompensas.append(float(recompensa_ep))
+            politica_ql.epsilon = max(0.01, politica_ql.epsilon * 0.995)
+            ep = len(historico_recompensas)
+            if ep % 100 == 0:
+                media = sum(historico_recompensas[-100:]) / 100
+                print(f"Ep {ep}/{episodios} | Rec: {media:.2f} | Epsilon: {politica_ql.epsilon:.3f}")
+
+    return politica_ql, historico_recompensas
+
+
+def run_training():
+    print("=== INICIANDO TREINO Q-LEARNING (MODO NATIVO) ===")
+    start_time = time.time()
+
+    if COPIAS > 1:
+        politica_ql, historico_recompensas = treinar_vetorizado(EPISODIOS, COPIAS)
+    else:
+        politica_ql, historico_recompensas = treinar(EPISODIOS)
 
-    # Mostrar gráfico de recompensas
+    # Mostrar gráfico de recompensas (matplotlib só é importado aqui)
+    import matplotlib.pyplot as plt
     plt.figure(figsize=(10, 5))
     x = range(len(historico_recompensas))
     # Pegar apenas num ponto a cada 10